@@ -1,5 +1,10 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Count
 from .models import Category, Location, Post, Comment
+from .paginators import EstimatedCountPaginator
+from .search import search_posts
+from .signals import batch_comment_purges
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -12,9 +17,15 @@ class PostAdmin(admin.ModelAdmin):
         'is_published'
     )
     list_editable = ('is_published',)
-    list_filter = ('category', 'location', 'is_published', 'pub_date')
+    # Места не выводятся в фильтре: их список может быть огромным,
+    # а фильтр загружает его целиком на каждой странице
+    list_filter = ('category', 'is_published', 'pub_date')
     search_fields = ('title', 'text')
     date_hierarchy = 'pub_date'
+    list_select_related = ('author', 'category', 'location')
+    autocomplete_fields = ('author', 'category', 'location')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         (None, {
@@ -29,6 +40,12 @@ class PostAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по индексу blog.search вместо LIKE '%...%' по тексту"""
+        if not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        return search_posts(search_term, queryset), False
+
 
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'is_published')
@@ -45,8 +62,46 @@ class LocationAdmin(admin.ModelAdmin):
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('post', 'author', 'created_at', 'text')
-    list_filter = ('created_at', 'author')
+    list_filter = ('created_at',)
     search_fields = ('text', 'author__username', 'post__title')
+    list_select_related = ('post', 'author')
+    autocomplete_fields = ('post', 'author')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # Счётчик Post.comment_count и отметка Post.updated_at
+    # поддерживаются при любых изменениях комментариев из админки,
+    # в том числе при переносе на другой пост.
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            old_post_id = None
+            if change and 'post' in form.changed_data:
+                old_post_id = form.initial.get('post')
+            super().save_model(request, obj, form, change)
+            if not change:
+                Post.objects.update_comment_count(obj.post_id, 1)
+            elif old_post_id is not None:
+                Post.objects.update_comment_count(old_post_id, -1)
+                Post.objects.update_comment_count(obj.post_id, 1)
+            else:
+                # Правка текста: страница поста изменилась, и её ETag
+                # должен смениться, как при edit_comment
+                Post.objects.touch(obj.post_id)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            Post.objects.update_comment_count(obj.post_id, -1)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            per_post = list(
+                queryset.order_by().values('post').annotate(total=Count('pk'))
+            )
+            with batch_comment_purges(row['post'] for row in per_post):
+                super().delete_queryset(request, queryset)
+            for row in per_post:
+                Post.objects.update_comment_count(row['post'], -row['total'])
 
 
 admin.site.register(Comment, CommentAdmin)
@@ -0,0 +1,41 @@
+"""
+Асинхронные версии лент и страницы поста для запуска под ASGI.
+
+В Django 3.2 у ORM нет асинхронного интерфейса (aget, acount и
+async for появились в 4.1), а запрос к базе из цикла событий
+запрещён. Поэтому представление целиком — кэш страниц, ETag,
+запросы и шаблон — выполняется одним переходом в поток синхронного
+кода (sync_to_async), а не переключается туда на каждый запрос
+к базе. Цикл событий в это время принимает и отдаёт другие запросы,
+а middleware проекта (blogicum.middleware) не заставляют Django
+переводить запрос в поток и обратно на каждом слое.
+
+Подключаются настройкой BLOG_ASYNC_VIEWS (см. blog.urls).
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+
+from blogicum.middleware import install_query_collectors
+
+from . import views
+
+
+def _in_request_thread(view):
+    def in_thread(request, *args, **kwargs):
+        # Соединение потока могло открыться до загрузки middleware
+        install_query_collectors()
+        return view(request, *args, **kwargs)
+
+    run = sync_to_async(in_thread, thread_sensitive=True)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run(request, *args, **kwargs)
+    return wrapper
+
+
+index = _in_request_thread(views.index)
+category_posts = _in_request_thread(views.category_posts)
+profile = _in_request_thread(views.profile)
+post_detail = _in_request_thread(views.post_detail)
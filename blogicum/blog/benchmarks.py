@@ -0,0 +1,468 @@
+"""Вспомогательные функции для нагрузочных замеров на отдельной базе."""
+import asyncio
+import importlib
+import io
+import math
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+
+from .models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+BENCH_ALIAS = 'bench'
+
+
+@contextmanager
+def scratch_database(path, alias=BENCH_ALIAS):
+    """
+    Подключает отдельный SQLite-файл под псевдонимом alias и мигрирует его.
+
+    Замеры никогда не трогают рабочую базу default.
+    """
+    default = connections.databases['default']
+    connections.databases[alias] = {
+        **default,
+        'NAME': str(path),
+        'OPTIONS': dict(default.get('OPTIONS', {})),
+        'TEST': {},
+    }
+    try:
+        call_command('migrate', database=alias, verbosity=0)
+        yield alias
+    finally:
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
+
+
+@contextmanager
+def scratch_default_database(path):
+    """
+    Временно направляет базу default на SQLite-файл path и мигрирует его.
+
+    Представления работают только с default, поэтому для замеров через
+    тестовый клиент база подменяется так же, как это делает тестовый
+    раннер Django.
+    """
+    connection = connections['default']
+    original = connection.settings_dict['NAME']
+    connection.close()
+    connection.settings_dict['NAME'] = str(path)
+    try:
+        call_command('migrate', verbosity=0)
+        yield connection.alias
+    finally:
+        connection.close()
+        connection.settings_dict['NAME'] = original
+
+
+def seed_feed(using, posts, comments=0, users=100, categories=50,
+              locations=100, batch_size=5000, stdout=None):
+    """
+    Досоздаёт в базе using синтетические посты и комментарии.
+
+    Уже существующие строки учитываются, поэтому повторный запуск
+    с тем же размером ничего не делает.
+    """
+    rnd = random.Random(posts)
+    now = timezone.now()
+
+    user_ids = _ensure(
+        using, User, users,
+        lambda i: User(username=f'bench_user_{i}', password='!'),
+    )
+    category_ids = _ensure(
+        using, Category, categories,
+        lambda i: Category(
+            title=f'Категория {i}', slug=f'bench-category-{i}',
+            description='', is_published=i % 10 != 0,
+        ),
+    )
+    location_ids = _ensure(
+        using, Location, locations,
+        lambda i: Location(name=f'Место {i}'),
+    )
+
+    def make_post(i):
+        post = Post(
+            title=f'Пост {i}',
+            text='Текст публикации ' * 20,
+            # Примерно 1% постов — отложенные публикации
+            pub_date=now - timedelta(minutes=rnd.randint(-15000, 10 ** 6)),
+            is_published=rnd.random() > 0.05,
+            author_id=rnd.choice(user_ids),
+            category_id=rnd.choice(category_ids),
+            location_id=rnd.choice(location_ids),
+        )
+        # bulk_create не вызывает save(), анонс заполняем сами
+        post.excerpt = post.make_excerpt()
+        return post
+
+    post_ids = _ensure(using, Post, posts, make_post, batch_size, stdout)
+    if comments:
+        _ensure(
+            using, Comment, comments,
+            lambda i: Comment(
+                text=f'Комментарий {i}',
+                post_id=rnd.choice(post_ids),
+                author_id=rnd.choice(user_ids),
+            ),
+            batch_size, stdout,
+        )
+        Post.objects.db_manager(using).recount_comments()
+
+
+def _ensure(using, model, total, factory, batch_size=5000, stdout=None):
+    manager = model._default_manager.db_manager(using)
+    existing = manager.count()
+    for start in range(existing, total, batch_size):
+        stop = min(start + batch_size, total)
+        manager.bulk_create(
+            [factory(i) for i in range(start, stop)], batch_size=batch_size
+        )
+        if stdout is not None:
+            stdout.write(f'{model.__name__}: {stop}/{total}')
+    return list(manager.order_by().values_list('pk', flat=True))
+
+
+def time_call(func, repeat):
+    """Возвращает медиану времени выполнения func в миллисекундах"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def percentile(timings, pct):
+    """Перцентиль pct (0–100) методом ближайшего ранга"""
+    ordered = sorted(timings)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def measure(func, repeat, warmup=1):
+    """
+    Выполняет func warmup раз вхолостую и repeat раз с замером.
+
+    Returns:
+        dict: p50, p99 и среднее в миллисекундах, пропускная способность
+            в запросах в секунду и число замеров.
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'rps': round(len(timings) / (sum(timings) / 1000), 1),
+        'runs': len(timings),
+    }
+
+
+def _expect(status, response):
+    if response.status_code != status:
+        raise RuntimeError(
+            f'{response.request["PATH_INFO"]}: ожидался ответ {status},'
+            f' получен {response.status_code}'
+        )
+
+
+def view_flows(server_name='localhost'):
+    """
+    Сценарии замера: имя -> функция, выполняющая один запрос клиентом.
+
+    Анонимный клиент смотрит ленты, залогиненный автор — ленты, пост,
+    порцию комментариев, пишет комментарии и публикует посты.
+    """
+    sample = Post.objects.filter_published().select_related(
+        'author', 'category'
+    ).order_by(*Post._meta.ordering).first()
+    if sample is None:
+        raise ValueError('В базе нет опубликованных постов для замера.')
+    author = sample.author
+
+    anonymous = Client(SERVER_NAME=server_name)
+    logged_in = Client(SERVER_NAME=server_name)
+    logged_in.force_login(author)
+
+    index = reverse('blog:index')
+    category = reverse('blog:category_posts', args=[sample.category.slug])
+    profile = reverse('blog:profile', args=[author.username])
+    detail = reverse('blog:post_detail', args=[sample.pk])
+    comments = reverse('blog:post_comments', args=[sample.pk])
+    comment = reverse('blog:add_comment', args=[sample.pk])
+    create = reverse('blog:create_post')
+    post_data = {
+        'title': 'Замер',
+        'text': 'Пост, созданный при замере производительности',
+        'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+        'category': sample.category_id,
+        'is_published': 'on',
+    }
+
+    return {
+        'index': lambda: _expect(200, anonymous.get(index)),
+        'index_page_50': lambda: _expect(
+            200, anonymous.get(index, {'page': 50})
+        ),
+        'category': lambda: _expect(200, anonymous.get(category)),
+        'profile': lambda: _expect(200, logged_in.get(profile)),
+        'detail': lambda: _expect(200, logged_in.get(detail)),
+        'comments': lambda: _expect(200, logged_in.get(comments)),
+        'comment_create': lambda: _expect(
+            302, logged_in.post(comment, {'text': 'Комментарий замера'})
+        ),
+        'post_create': lambda: _expect(302, logged_in.post(create, post_data)),
+    }
+
+
+def run_flows(flows, repeat, warmup=1, stdout=None):
+    """Замеряет каждый сценарий и возвращает {имя: результат measure}"""
+    results = {}
+    for name, flow in flows.items():
+        results[name] = measure(flow, repeat, warmup)
+        if stdout is not None:
+            stdout.write(
+                f'{name:<16} p50 {results[name]["p50_ms"]:>9.2f} мс'
+                f'  p99 {results[name]["p99_ms"]:>9.2f} мс'
+                f'  {results[name]["rps"]:>8.1f} rps'
+            )
+    return results
+
+
+def compare_results(baseline, current, tolerance):
+    """
+    Сравнивает p50 и p99 с базовым прогоном.
+
+    Returns:
+        list: (сценарий, метрика, было, стало) для метрик, выросших
+            больше чем на долю tolerance.
+    """
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    (name, metric, before[metric], result[metric])
+                )
+    return regressions
+
+
+def comment_writes(post, users, comments, server_name='localhost'):
+    """
+    Каждый пользователь из users в своём потоке отправляет comments
+    комментариев к post через add_comment.
+
+    Потоки стартуют одновременно и пишут в базу параллельно, у каждого
+    своё соединение — как у воркеров сервера.
+
+    Returns:
+        dict: Успешные записи, ошибки (ответ не 302 или ошибка базы),
+            общее время, записей в секунду и p50/p99 одного запроса.
+    """
+    url = reverse('blog:add_comment', args=[post.pk])
+    clients = []
+    for user in users:
+        client = Client(SERVER_NAME=server_name)
+        client.force_login(user)
+        clients.append(client)
+    barrier = threading.Barrier(len(clients) + 1)
+    timings = []
+    errors = []
+
+    def worker(client):
+        barrier.wait()
+        try:
+            for _ in range(comments):
+                started = time.perf_counter()
+                try:
+                    response = client.post(url, {'text': 'Замер записи'})
+                except DatabaseError as error:
+                    errors.append(error)
+                    continue
+                if response.status_code != 302:
+                    errors.append(response.status_code)
+                    continue
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connections.close_all()
+
+    threads = [
+        threading.Thread(target=worker, args=(client,)) for client in clients
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'writes': len(timings),
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'writes_per_second': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3) if timings else None,
+        'p99_ms': round(percentile(timings, 99), 3) if timings else None,
+    }
+
+
+def _reload_urls():
+    importlib.reload(importlib.import_module('blog.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@contextmanager
+def use_async_views(enabled):
+    """
+    Переключает BLOG_ASYNC_VIEWS и перечитывает маршруты: blog.urls
+    выбирает представления при импорте.
+    """
+    try:
+        with override_settings(BLOG_ASYNC_VIEWS=enabled):
+            _reload_urls()
+            yield
+    finally:
+        _reload_urls()
+
+
+def feed_paths():
+    """Адреса лент и страницы поста для анонимного посетителя"""
+    sample = Post.objects.filter_published().select_related(
+        'author', 'category'
+    ).order_by(*Post._meta.ordering).first()
+    if sample is None:
+        raise ValueError('В базе нет опубликованных постов для замера.')
+    return [
+        reverse('blog:index'),
+        reverse('blog:category_posts', args=[sample.category.slug]),
+        reverse('blog:profile', args=[sample.author.username]),
+        reverse('blog:post_detail', args=[sample.pk]),
+    ]
+
+
+def _summary(timings, errors, elapsed):
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'rps': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3) if timings else None,
+        'p99_ms': round(percentile(timings, 99), 3) if timings else None,
+    }
+
+
+def wsgi_throughput(handler, paths, requests, concurrency,
+                    server_name='localhost'):
+    """
+    Отправляет requests GET-запросов по кругу по paths в WSGI-обработчик
+    из concurrency потоков — как многопоточный WSGI-сервер.
+    """
+    def call(path):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+        }
+        status = []
+        started = time.perf_counter()
+        response = handler(
+            environ, lambda code, headers: status.append(code)
+        )
+        try:
+            b''.join(response)
+        finally:
+            response.close()
+        return status[0].startswith('200'), time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(
+            call, (paths[i % len(paths)] for i in range(requests))
+        ))
+    elapsed = time.perf_counter() - started
+    timings = [duration * 1000 for ok, duration in results if ok]
+    return _summary(timings, len(results) - len(timings), elapsed)
+
+
+def asgi_throughput(handler, paths, requests, concurrency,
+                    server_name='localhost'):
+    """
+    Отправляет requests GET-запросов по кругу по paths в ASGI-обработчик,
+    держа одновременно не больше concurrency запросов — как ASGI-сервер
+    с одним циклом событий.
+    """
+    async def call(path, limit):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', server_name.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': (server_name, 80),
+        }
+        status = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        async with limit:
+            started = time.perf_counter()
+            await handler(scope, receive, send)
+            return status == [200], time.perf_counter() - started
+
+    async def run():
+        limit = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(
+            call(paths[i % len(paths)], limit) for i in range(requests)
+        ))
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    timings = [duration * 1000 for ok, duration in results if ok]
+    return _summary(timings, len(results) - len(timings), elapsed)
@@ -0,0 +1,281 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Max, Min
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from django.views.decorators.http import condition
+
+from blogicum.metrics import REGISTRY
+from blogicum.replicas import reading_from_replicas
+
+# Каким условием выбрать посты области кэша, чтобы найти ближайшую
+# отложенную публикацию
+SCOPE_LOOKUPS = {
+    'index': None,
+    'category': 'category__slug',
+    'author': 'author__username',
+}
+ALL_PAGES = 'all'
+
+CONDITIONAL_RESPONSES = REGISTRY.counter(
+    'blogicum_conditional_responses_total',
+    'Ответы представлений блога с валидаторами ETag/Last-Modified: '
+    'not_modified — 304 без отрисовки шаблона, full — полная страница.'
+)
+
+
+def _page_cache():
+    return caches[settings.BLOG_PAGE_CACHE_ALIAS]
+
+
+def _generation_key(scope):
+    return f'blog:page_gen:{scope}'
+
+
+def _generations(scopes):
+    """
+    Возвращает текущие поколения областей кэша.
+
+    Отсутствующее поколение заводится от текущего времени, а не с 1:
+    если счётчик вытеснят из кэша, старые страницы не совпадут с новыми
+    ключами.
+    """
+    cache = _page_cache()
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def purge_pages(*scopes):
+    """Сбрасывает закэшированные страницы указанных областей"""
+    cache = _page_cache()
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def purge_post_pages(category_slug, author_username):
+    """Сбрасывает страницы лент, в которых показывается пост"""
+    scopes = ['index', f'author:{author_username}']
+    if category_slug:
+        scopes.append(f'category:{category_slug}')
+    purge_pages(*scopes)
+
+
+def purge_all_pages():
+    """Сбрасывает все закэшированные страницы лент"""
+    purge_pages(ALL_PAGES)
+
+
+def _timeout_until_next_publication(kind, value):
+    """
+    Время жизни страницы: не дольше BLOG_PAGE_CACHE_TIMEOUT и не позже
+    момента, когда в области станет видна ближайшая отложенная публикация.
+    """
+    from .models import Post
+
+    timeout = settings.BLOG_PAGE_CACHE_TIMEOUT
+    now = timezone.now()
+    scheduled = Post.objects.filter(is_published=True, pub_date__gt=now)
+    lookup = SCOPE_LOOKUPS[kind]
+    if lookup:
+        scheduled = scheduled.filter(**{lookup: value})
+    next_pub_date = scheduled.aggregate(next=Min('pub_date'))['next']
+    if next_pub_date is not None:
+        timeout = min(timeout, (next_pub_date - now).total_seconds() + 1)
+    return max(int(timeout), 1)
+
+
+def cache_anonymous_page(kind, kwarg=None):
+    """
+    Кэширует целиком страницу ленты для анонимных GET-запросов.
+
+    Ключ страницы включает поколение всей ленты, поколение своей
+    области (лента, категория kwarg или автор kwarg) и полный путь
+    запроса с номером страницы. Сигналы моделей сбрасывают только
+    затронутые области (см. blog.signals).
+
+    Args:
+        kind (str): Вид области: 'index', 'category' или 'author'.
+        kwarg (str, optional): Аргумент представления со slug категории
+            или именем автора.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                not settings.BLOG_PAGE_CACHE_TIMEOUT
+                or request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+            ):
+                return view(request, *args, **kwargs)
+
+            value = kwargs.get(kwarg) if kwarg else None
+            scope = f'{kind}:{value}' if kwarg else kind
+            generations = _generations([ALL_PAGES, scope])
+            key = 'blog:page:{}:{}:{}'.format(
+                scope,
+                ':'.join(str(generation) for generation in generations),
+                hashlib.md5(request.get_full_path().encode()).hexdigest(),
+            )
+            cache = _page_cache()
+            response = cache.get(key)
+            if response is not None:
+                # Валидаторы сохранены вместе со страницей и действительны,
+                # пока жив ключ: отвечаем 304 без обращения к базе.
+                response = get_conditional_response(
+                    request,
+                    etag=response.get('ETag'),
+                    last_modified=parse_http_date_safe(
+                        response.get('Last-Modified', '')
+                    ),
+                    response=response,
+                )
+                _count_conditional(view, response)
+                return response
+
+            # Страница попадёт в общий кэш, поэтому читаем из default:
+            # реплика могла ещё не получить правку, из-за которой кэш
+            # только что сброшен, и устаревшая страница прожила бы
+            # до следующего сброса
+            with reading_from_replicas(False):
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200 and not response.cookies:
+                    cache.set(
+                        key, response,
+                        _timeout_until_next_publication(kind, value)
+                    )
+            return response
+        return wrapper
+    return decorator
+
+
+def _count_conditional(view, response):
+    CONDITIONAL_RESPONSES.inc(
+        view=view.__name__,
+        result='not_modified' if response.status_code == 304 else 'full',
+    )
+
+
+def _feed_stamp(request, kind, value):
+    """
+    Отметки ленты: время последнего видимого поста области и последней
+    правки любого поста (оба значения берутся по индексам), а также
+    поколения областей кэша — они меняются при удалениях и правках
+    категорий, мест и пользователей.
+    """
+    from .models import Post
+
+    published = Post.objects.filter(
+        is_published=True, pub_date__lte=timezone.now()
+    )
+    lookup = SCOPE_LOOKUPS[kind]
+    if lookup:
+        published = published.filter(**{lookup: value})
+    stamps = [
+        published.aggregate(last=Max('pub_date'))['last'],
+        Post.objects.aggregate(last=Max('updated_at'))['last'],
+    ]
+    scope = f'{kind}:{value}' if lookup else kind
+    return (
+        max((stamp for stamp in stamps if stamp), default=None),
+        _generations([ALL_PAGES, scope]),
+    )
+
+
+def _post_stamp(request, pk):
+    """Отметки страницы поста: правки поста, его категории и места"""
+    from .models import Post
+
+    row = Post.objects.filter_visible(request.user).filter(pk=pk).values_list(
+        'updated_at', 'category__updated_at', 'location__updated_at'
+    ).first()
+    if row is None:
+        return None
+    return (
+        max(stamp for stamp in row if stamp),
+        _generations([ALL_PAGES]),
+    )
+
+
+def _conditional(view, get_stamp):
+    """
+    Оборачивает представление в django.views.decorators.http.condition.
+
+    ETag строится из отметок get_stamp, пути запроса, пользователя
+    (шапка страницы у каждого пользователя своя) и его CSRF-токена,
+    который вшит в формы страницы.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        computed = []
+
+        def stamp():
+            if not computed:
+                computed.append(get_stamp(request, **kwargs))
+            return computed[0]
+
+        def etag(request, *args, **kwargs):
+            if stamp() is None:
+                return None
+            last_modified, parts = stamp()
+            user_id, csrf_cookie = '', None
+            if request.user.is_authenticated:
+                user_id = request.user.pk
+                # CSRF-токен меняется при входе: форма со страницы
+                # из кэша браузера отправила бы старый токен и получила
+                # 403. get_token заводит токен, если его ещё нет.
+                get_token(request)
+                csrf_cookie = request.META.get('CSRF_COOKIE')
+            digest = hashlib.md5(repr((
+                user_id, csrf_cookie, request.get_full_path(),
+                last_modified, parts
+            )).encode()).hexdigest()
+            return f'W/"{digest}"'
+
+        def last_modified(request, *args, **kwargs):
+            return stamp()[0] if stamp() is not None else None
+
+        response = condition(etag_func=etag, last_modified_func=last_modified)(
+            view
+        )(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD'):
+            _count_conditional(view, response)
+        return response
+    return wrapper
+
+
+def conditional_feed(kind, kwarg=None):
+    """
+    Добавляет ленте ETag и Last-Modified и отвечает 304 без отрисовки.
+
+    Аргументы те же, что у cache_anonymous_page.
+    """
+    def decorator(view):
+        return _conditional(
+            view,
+            lambda request, **kwargs: _feed_stamp(
+                request, kind, kwargs.get(kwarg) if kwarg else None
+            )
+        )
+    return decorator
+
+
+def conditional_post(view):
+    """Заголовки ETag и Last-Modified для страниц поста с аргументом pk"""
+    return _conditional(
+        view, lambda request, pk, **kwargs: _post_stamp(request, pk)
+    )
@@ -0,0 +1,201 @@
+"""Потоковая выгрузка дампов и пакетная загрузка их в базу."""
+import gzip
+import json
+import re
+from itertools import islice
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import prefetch_related_objects
+
+_SEPARATORS = re.compile(r'[\s,\[\]]*')
+
+
+def open_dump(path):
+    """Открывает дамп на чтение; файлы .gz распаковываются на лету"""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def iter_dump_objects(stream, chunk_size=1 << 16):
+    """
+    Лениво читает объекты верхнего уровня из текстового потока.
+
+    Подходит и для JSON-массива dumpdata, и для JSON Lines: между
+    объектами пропускаются пробелы, запятые и скобки массива. В памяти
+    держится только непрочитанный хвост буфера.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    # Разобран ли хоть один объект после последнего чтения
+    progressed = True
+    while True:
+        position = _SEPARATORS.match(buffer, position).end()
+        if position < len(buffer):
+            try:
+                obj, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                progressed = True
+                yield obj
+                continue
+        elif eof:
+            return
+        # Объект не поместился в буфер: следующая порция не меньше уже
+        # прочитанной его части, чтобы не разбирать его заново на каждой
+        # мелкой порции. Дальше снова читаем по chunk_size.
+        read_size = chunk_size if progressed else max(
+            chunk_size, len(buffer) - position
+        )
+        chunk = stream.read(read_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+        progressed = False
+
+
+class BulkLoader:
+    """
+    Копит десериализованные объекты по моделям и сохраняет их
+    bulk_create-пакетами по batch_size.
+
+    Перед пакетом модели сохраняются накопленные объекты моделей,
+    на которые она ссылается. Сигналы save() не отправляются.
+    Строки с уже существующими первичными ключами обновляются
+    bulk_update, как при loaddata.
+    """
+
+    def __init__(self, batch_size=2000, exclude=()):
+        self.batch_size = batch_size
+        self.exclude = {label.lower() for label in exclude}
+        self.pending = {}
+        self.m2m = {}
+        self.counts = {}
+
+    def add(self, data):
+        if data['model'].lower() in self.exclude:
+            return
+        for deserialized in serializers.deserialize(
+            'python', [data], ignorenonexistent=True
+        ):
+            model = type(deserialized.object)
+            self.pending.setdefault(model, []).append(deserialized.object)
+            if len(self.pending[model]) >= self.batch_size:
+                self.flush(model)
+            for name, values in (deserialized.m2m_data or {}).items():
+                if values:
+                    self._add_m2m(model, deserialized.object.pk, name, values)
+
+    def _add_m2m(self, model, pk, name, values):
+        field = model._meta.get_field(name)
+        through = field.remote_field.through
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+        rows = self.m2m.setdefault((model, name), [])
+        rows.extend(
+            through(**{source: pk, target: value}) for value in values
+        )
+        if len(rows) >= self.batch_size:
+            self._save_m2m(model, name, self.m2m.pop((model, name)))
+
+    def flush(self, model=None, _seen=None):
+        """Сохраняет накопленное для model (или для всех моделей)"""
+        if model is None:
+            for model in list(self.pending):
+                self.flush(model)
+            for (model, name), rows in list(self.m2m.items()):
+                self._save_m2m(model, name, rows)
+            self.m2m.clear()
+            return
+
+        seen = _seen or set()
+        seen.add(model)
+        for field in model._meta.concrete_fields:
+            related = field.related_model if field.is_relation else None
+            if related and related not in seen and self.pending.get(related):
+                self.flush(related, seen)
+
+        objects = self.pending.pop(model, [])
+        if not objects:
+            return
+        manager = model._base_manager
+        existing = set(manager.filter(
+            pk__in=[obj.pk for obj in objects if obj.pk is not None]
+        ).values_list('pk', flat=True))
+        manager.bulk_create(
+            [obj for obj in objects if obj.pk not in existing],
+            batch_size=self.batch_size,
+        )
+        if existing:
+            manager.bulk_update(
+                [obj for obj in objects if obj.pk in existing],
+                [
+                    field.name for field in model._meta.concrete_fields
+                    if not field.primary_key
+                ],
+                batch_size=self.batch_size,
+            )
+        label = model._meta.label
+        self.counts[label] = self.counts.get(label, 0) + len(objects)
+
+    def _save_m2m(self, model, name, rows):
+        field = model._meta.get_field(name)
+        self.flush(model)
+        self.flush(field.related_model)
+        through = field.remote_field.through
+        source = f'{field.m2m_field_name()}_id'
+        # Как и при loaddata, связи объекта из дампа заменяют прежние
+        through._base_manager.filter(**{
+            f'{source}__in': {getattr(row, source) for row in rows}
+        }).delete()
+        through._base_manager.bulk_create(rows, batch_size=self.batch_size)
+
+    def reset_sequences(self):
+        """Сдвигает счётчики автоинкремента за загруженные ключи"""
+        models = [apps.get_model(label) for label in self.counts]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def export_chunks(queryset, chunk_size, after_pk=None):
+    """
+    Отдаёт объекты queryset по возрастанию ключа порциями chunk_size.
+
+    Строки читаются одним курсором через iterator(), в памяти только
+    текущая порция; связи многие-ко-многим подгружаются на порцию
+    одним запросом на поле. after_pk продолжает выгрузку с места
+    остановки.
+    """
+    model = queryset.model
+    if after_pk is not None:
+        queryset = queryset.filter(pk__gt=after_pk)
+    m2m = [
+        field.name for field in model._meta.many_to_many
+        if field.remote_field.through._meta.auto_created
+    ]
+    rows = queryset.order_by('pk').iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        if m2m:
+            prefetch_related_objects(chunk, *m2m)
+        yield chunk
+
+
+def serialize_lines(objects):
+    """Объекты в формате dumpdata, по одному JSON на строку"""
+    return ''.join(
+        json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+        for data in serializers.serialize('python', objects)
+    ).encode('utf-8')
@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django.contrib.auth import get_user_model
 from .models import Post, Comment, Category, Location
+from .widgets import AutocompleteSelect
 
 User = get_user_model()
 
@@ -39,8 +40,14 @@ class PostForm(forms.ModelForm):
             'pub_date': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'text': forms.Textarea(attrs={'rows': 10, 'class': 'form-control'}),
             'title': forms.TextInput(attrs={'class': 'form-control'}),
-            'location': forms.Select(attrs={'class': 'form-control'}),
-            'category': forms.Select(attrs={'class': 'form-control'}),
+            # Списки мест и категорий не выводятся целиком:
+            # варианты подгружаются по мере набора
+            'location': AutocompleteSelect(
+                'blog:location_autocomplete', attrs={'class': 'form-control'}
+            ),
+            'category': AutocompleteSelect(
+                'blog:category_autocomplete', attrs={'class': 'form-control'}
+            ),
             'is_published': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
 
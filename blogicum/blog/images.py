@@ -0,0 +1,97 @@
+"""Уменьшенные копии изображений постов для srcset."""
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Ширины копий в пикселях: карточка в ленте занимает до 40rem,
+# страница поста — столько же, третья ширина для экранов с высокой
+# плотностью пикселей
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+VARIANT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+VARIANTS_DIR = 'variants'
+
+
+def _variant_widths(width):
+    """Ширины копий, не превышающие оригинал; хотя бы одна копия"""
+    widths = [size for size in VARIANT_WIDTHS if size < width]
+    if len(widths) < len(VARIANT_WIDTHS):
+        widths.append(min(width, VARIANT_WIDTHS[-1]))
+    return widths
+
+
+def generate_variants(image):
+    """
+    Сохраняет рядом с оригиналом уменьшенные копии в WebP и JPEG.
+
+    Args:
+        image (FieldFile): Загруженное изображение поста.
+
+    Returns:
+        dict: Имя оригинала (source), размеры самой крупной копии
+            (width, height) и для каждого формата список пар
+            [ширина, имя файла в хранилище].
+    """
+    with image.open('rb') as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'A' in original.mode else 'RGB')
+
+    directory, filename = posixpath.split(image.name)
+    stem = posixpath.splitext(filename)[0]
+    variants = {'source': image.name}
+    try:
+        for width in _variant_widths(original.width):
+            height = round(original.height * width / original.width)
+            resized = original.resize(
+                (width, height), Image.Resampling.LANCZOS
+            )
+            for kind, (pillow_format, options) in VARIANT_FORMATS.items():
+                frame = resized
+                if pillow_format == 'JPEG' and frame.mode != 'RGB':
+                    frame = frame.convert('RGB')
+                buffer = BytesIO()
+                frame.save(buffer, pillow_format, **options)
+                name = image.storage.save(
+                    posixpath.join(
+                        directory, VARIANTS_DIR,
+                        f'{stem}_{width}w.{VARIANT_EXTENSIONS[kind]}'
+                    ),
+                    ContentFile(buffer.getvalue()),
+                )
+                variants.setdefault(kind, []).append([width, name])
+            variants['width'], variants['height'] = width, height
+    except BaseException:
+        # Недоделанный набор копий не нужен: убираем сохранённые файлы
+        delete_variants(image.storage, variants)
+        raise
+    return variants
+
+
+def variant_names(variants):
+    """Имена файлов всех копий из variants"""
+    return {
+        name
+        for kind in VARIANT_FORMATS
+        for _, name in variants.get(kind, ())
+    }
+
+
+def delete_variants(storage, variants, keep=()):
+    """Удаляет из хранилища копии, перечисленные в variants, кроме keep"""
+    for name in variant_names(variants) - set(keep):
+        storage.delete(name)
+
+
+def srcset(storage, variants, kind):
+    """Значение атрибута srcset для копий формата kind"""
+    return ', '.join(
+        f'{storage.url(name)} {width}w'
+        for width, name in variants.get(kind, ())
+    )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет анонсы (Post.excerpt) у постов, '
+        'сохранённых до их появления.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько постов загружать и обновлять за один проход.',
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать анонсы у всех постов, а не только у пустых.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Post.objects.only('pk', 'text', 'excerpt').order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(excerpt='')
+
+        updated = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            changed = []
+            for post in batch:
+                excerpt = post.make_excerpt()
+                if excerpt != post.excerpt:
+                    post.excerpt = excerpt
+                    changed.append(post)
+            Post.objects.bulk_update(changed, ['excerpt'])
+            updated += len(changed)
+            last_pk = batch[-1].pk
+        self.stdout.write(self.style.SUCCESS(f'Обновлено анонсов: {updated}'))
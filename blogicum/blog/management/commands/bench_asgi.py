@@ -0,0 +1,74 @@
+import tempfile
+from pathlib import Path
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from blog.benchmarks import (
+    asgi_throughput, feed_paths, scratch_default_database, seed_feed,
+    use_async_views, wsgi_throughput,
+)
+
+# Режим -> (асинхронные представления, функция замера, обработчик)
+MODES = {
+    'wsgi': (False, wsgi_throughput, WSGIHandler),
+    'asgi': (False, asgi_throughput, ASGIHandler),
+    'asgi_async_views': (True, asgi_throughput, ASGIHandler),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность лент и страницы поста при '
+        'одновременных запросах: WSGI с пулом потоков, ASGI с обычными '
+        'и с асинхронными представлениями (blog.async_views).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--comments', type=int, default=50_000)
+        parser.add_argument(
+            '--requests', type=int, default=400,
+            help='Сколько запросов отправить в каждом режиме.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=16,
+            help='Сколько запросов выполняется одновременно.',
+        )
+        parser.add_argument(
+            '--mode', choices=MODES, action='append',
+            help='Замерить только этот режим (можно несколько раз).',
+        )
+        parser.add_argument(
+            '--db', type=Path,
+            default=Path(tempfile.gettempdir()) / 'blogicum_asgi.sqlite3',
+            help='SQLite-файл для замеров; данные досоздаются при нехватке.',
+        )
+
+    def handle(self, *args, **options):
+        overrides = {
+            'DEBUG': False,
+            'ALLOWED_HOSTS': ['localhost'],
+            'NPLUSONE_DETECTOR': None,
+            # Без кэша страниц каждый запрос доходит до базы
+            'BLOG_PAGE_CACHE_TIMEOUT': 0,
+        }
+        with scratch_default_database(options['db']) as alias, \
+                override_settings(**overrides):
+            seed_feed(alias, options['posts'], options['comments'])
+            paths = feed_paths()
+            for mode in options['mode'] or MODES:
+                use_async, run, handler_class = MODES[mode]
+                with use_async_views(use_async):
+                    result = run(
+                        handler_class(), paths, options['requests'],
+                        options['concurrency'],
+                    )
+                self.stdout.write(
+                    f'{mode:<17} {result["rps"]:>8.1f} rps'
+                    f'  ошибок {result["errors"]:>4}'
+                    f'  p50 {result["p50_ms"] or 0:>8.2f} мс'
+                    f'  p99 {result["p99_ms"] or 0:>8.2f} мс'
+                )
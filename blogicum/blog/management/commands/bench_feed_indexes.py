@@ -0,0 +1,112 @@
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.benchmarks import scratch_database, seed_feed, time_call
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает планы EXPLAIN и время запросов лент до и после '
+        'составных индексов на отдельной синтетической SQLite-базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=1_000_000,
+            help='Сколько постов должно быть в базе для замера.',
+        )
+        parser.add_argument(
+            '--comments', type=int, default=1_000_000,
+            help='Сколько комментариев должно быть в базе для замера.',
+        )
+        parser.add_argument(
+            '--db', type=Path,
+            default=Path(tempfile.gettempdir()) / 'blogicum_bench.sqlite3',
+            help='SQLite-файл для замеров; данные досоздаются при нехватке.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз выполнять каждый запрос (берётся медиана).',
+        )
+
+    def handle(self, *args, **options):
+        with scratch_database(options['db']) as alias:
+            seed_feed(
+                alias, options['posts'], options['comments'],
+                stdout=self.stdout,
+            )
+            connections[alias].cursor().execute('ANALYZE')
+            scenarios = self.get_scenarios(alias)
+            indexes = [
+                (model, index)
+                for model in (Post, Comment)
+                for index in model._meta.indexes
+            ]
+
+            self.set_indexes(alias, indexes, present=False)
+            before = self.run(scenarios, options['repeat'], 'без индексов')
+            self.set_indexes(alias, indexes, present=True)
+            after = self.run(scenarios, options['repeat'], 'с индексами')
+
+        self.stdout.write('\nИтог, мс (медиана):')
+        for name in scenarios:
+            self.stdout.write(
+                f'  {name:<28} {before[name]:>10.2f} -> {after[name]:>10.2f}'
+                f'  (x{before[name] / max(after[name], 1e-6):.1f})'
+            )
+
+    def get_scenarios(self, alias):
+        posts = Post.objects.db_manager(alias)
+        sample = posts.filter_published().order_by('-pub_date').first()
+        feed = posts.filter_published().select_related(
+            'author', 'location', 'category'
+        ).order_by(*Post._meta.ordering)
+        return {
+            'лента: страница 1': feed[:10],
+            'лента: страница 500': feed[4990:5000],
+            'категория: страница 1': feed.filter(
+                category_id=sample.category_id
+            )[:10],
+            'автор (владелец): страница 1': posts.filter(
+                author_id=sample.author_id
+            ).select_related(
+                'author', 'location', 'category'
+            ).order_by(*Post._meta.ordering)[:10],
+            'комментарии поста': Comment.objects.using(alias).filter(
+                post_id=sample.pk
+            ).select_related('author'),
+        }
+
+    def set_indexes(self, alias, indexes, present):
+        introspection = connections[alias].introspection
+        with connections[alias].cursor() as cursor:
+            existing = {
+                name
+                for model in (Post, Comment)
+                for name in introspection.get_constraints(
+                    cursor, model._meta.db_table
+                )
+            }
+        with connections[alias].schema_editor() as editor:
+            for model, index in indexes:
+                if present and index.name not in existing:
+                    editor.add_index(model, index)
+                elif not present and index.name in existing:
+                    editor.remove_index(model, index)
+        connections[alias].cursor().execute('ANALYZE')
+
+    def run(self, scenarios, repeat, title):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {title} =='))
+        timings = {}
+        for name, queryset in scenarios.items():
+            self.stdout.write(self.style.MIGRATE_LABEL(name))
+            self.stdout.write(queryset.explain())
+            timings[name] = time_call(
+                lambda: list(queryset.all()), repeat
+            )
+            self.stdout.write(f'{timings[name]:.2f} мс')
+        return timings
@@ -0,0 +1,105 @@
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+
+from blog.benchmarks import comment_writes, scratch_default_database, seed_feed
+from blog.models import Post
+from blogicum import settings_production
+
+User = get_user_model()
+
+PROFILES = {
+    'default': {'pragmas': {}, 'conn_max_age': 0, 'options': {}},
+    'production': {
+        'pragmas': settings_production.SQLITE_PRAGMAS,
+        'conn_max_age': settings_production.DATABASES['default'][
+            'CONN_MAX_AGE'
+        ],
+        'options': settings_production.DATABASES['default']['OPTIONS'],
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность параллельной записи '
+        'комментариев в SQLite с настройками по умолчанию и с профилем '
+        'blogicum.settings_production (WAL, busy_timeout, mmap, '
+        'постоянные соединения).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Сколько пользователей пишут одновременно.',
+        )
+        parser.add_argument(
+            '--comments', type=int, default=50,
+            help='Сколько комментариев отправляет каждый пользователь.',
+        )
+        parser.add_argument(
+            '--posts', type=int, default=1000,
+            help='Сколько постов создать в базе замера.',
+        )
+        parser.add_argument(
+            '--dir', type=Path, default=Path(tempfile.gettempdir()),
+            help='Каталог для файлов баз; у каждого профиля свой файл.',
+        )
+
+    def handle(self, *args, **options):
+        overrides = {
+            'DEBUG': False,
+            'ALLOWED_HOSTS': ['localhost'],
+            'NPLUSONE_DETECTOR': None,
+            'TASKS_EAGER': False,
+        }
+        results = {}
+        for name, profile in PROFILES.items():
+            # Режим WAL сохраняется в файле: каждый профиль
+            # начинает с новой базы
+            path = options['dir'] / f'blogicum_writes_{name}.sqlite3'
+            for suffix in ('', '-wal', '-shm'):
+                Path(f'{path}{suffix}').unlink(missing_ok=True)
+            database = connections.databases['default']
+            original = {
+                key: database.get(key) for key in ('CONN_MAX_AGE', 'OPTIONS')
+            }
+            with override_settings(
+                SQLITE_PRAGMAS=profile['pragmas'], **overrides
+            ):
+                database['CONN_MAX_AGE'] = profile['conn_max_age']
+                database['OPTIONS'] = profile['options']
+                try:
+                    with scratch_default_database(path) as alias:
+                        seed_feed(
+                            alias, options['posts'],
+                            users=options['threads'], categories=5,
+                            locations=5,
+                        )
+                        post = Post.objects.order_by('pk').first()
+                        users = User.objects.order_by('pk')[
+                            :options['threads']
+                        ]
+                        results[name] = comment_writes(
+                            post, list(users), options['comments']
+                        )
+                finally:
+                    database.update(original)
+            result = results[name]
+            self.stdout.write(
+                f'{name:<11} {result["writes_per_second"]:>8.1f} записей/с'
+                f'  ошибок {result["errors"]:>4}'
+                f'  p50 {result["p50_ms"] or 0:>8.2f} мс'
+                f'  p99 {result["p99_ms"] or 0:>8.2f} мс'
+            )
+
+        before = results['default']['writes_per_second']
+        after = results['production']['writes_per_second']
+        if before:
+            self.stdout.write(self.style.SUCCESS(
+                f'Профиль production: x{after / before:.2f} к записи.'
+            ))
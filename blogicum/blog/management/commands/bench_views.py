@@ -0,0 +1,112 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from blog.benchmarks import (
+    compare_results, run_flows, scratch_default_database, seed_feed,
+    view_flows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет отдельную SQLite-базу синтетическими данными и замеряет '
+        'p50/p99 и пропускную способность основных страниц блога через '
+        'тестовый клиент Django.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--comments', type=int, default=10_000_000)
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--categories', type=int, default=200)
+        parser.add_argument('--locations', type=int, default=1_000)
+        parser.add_argument(
+            '--db', type=Path,
+            default=Path(tempfile.gettempdir()) / 'blogicum_views.sqlite3',
+            help='SQLite-файл для замеров; данные досоздаются при нехватке.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Сколько замеров делать на каждый сценарий.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Сколько холостых запросов делать перед замером.',
+        )
+        parser.add_argument(
+            '--no-page-cache', action='store_true',
+            help='Отключить кэш страниц лент для анонимных посетителей.',
+        )
+        parser.add_argument(
+            '--output', type=Path,
+            help='Куда сохранить результаты в JSON.',
+        )
+        parser.add_argument(
+            '--compare', type=Path,
+            help='JSON прошлого прогона; рост p50/p99 сверх --tolerance '
+                 'завершает команду с ошибкой.',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост задержки при сравнении (доля).',
+        )
+
+    def handle(self, *args, **options):
+        overrides = {
+            'DEBUG': False,
+            'ALLOWED_HOSTS': ['localhost'],
+            'NPLUSONE_DETECTOR': None,
+        }
+        if options['no_page_cache']:
+            overrides['BLOG_PAGE_CACHE_TIMEOUT'] = 0
+
+        with scratch_default_database(options['db']) as alias, \
+                override_settings(**overrides):
+            seed_feed(
+                alias, options['posts'], options['comments'],
+                users=options['users'], categories=options['categories'],
+                locations=options['locations'], stdout=self.stdout,
+            )
+            results = run_flows(
+                view_flows(), options['repeat'], options['warmup'],
+                stdout=self.stdout,
+            )
+
+        report = {
+            'scale': {
+                name: options[name]
+                for name in ('posts', 'comments', 'users', 'categories',
+                             'locations')
+            },
+            'page_cache': not options['no_page_cache'],
+            'results': results,
+        }
+        if options['output']:
+            options['output'].write_text(
+                json.dumps(report, ensure_ascii=False, indent=2),
+                encoding='utf-8',
+            )
+            self.stdout.write(f'Результаты сохранены в {options["output"]}')
+
+        if options['compare']:
+            baseline = json.loads(
+                options['compare'].read_text(encoding='utf-8')
+            )
+            regressions = compare_results(
+                baseline['results'], results, options['tolerance']
+            )
+            for name, metric, before, after in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f'{name}: {metric} {before:.2f} -> {after:.2f} мс'
+                ))
+            if regressions:
+                raise CommandError(
+                    f'Задержка выросла больше чем на '
+                    f'{options["tolerance"]:.0%} в {len(regressions)} '
+                    f'метриках.'
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
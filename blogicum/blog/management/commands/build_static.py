@@ -0,0 +1,54 @@
+import os
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from blogicum.storage import ENCODINGS
+
+STORAGE = 'blogicum.storage.CompressedManifestStaticFilesStorage'
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает статику в STATIC_ROOT: имена с хэшем содержимого, '
+        'staticfiles.json и сжатые копии .gz (и .br при установленном '
+        'brotli) для StaticFilesMiddleware.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить прежнюю сборку перед копированием.',
+        )
+
+    def handle(self, *args, **options):
+        with override_settings(STATICFILES_STORAGE=STORAGE):
+            call_command(
+                'collectstatic', interactive=False, clear=options['clear'],
+                verbosity=0,
+            )
+
+        sizes = {'': 0, **{suffix: 0 for suffix in ENCODINGS.values()}}
+        counts = dict.fromkeys(sizes, 0)
+        for directory, _, filenames in os.walk(settings.STATIC_ROOT):
+            for filename in filenames:
+                suffix = os.path.splitext(filename)[1]
+                kind = suffix if suffix in sizes else ''
+                sizes[kind] += os.path.getsize(
+                    os.path.join(directory, filename)
+                )
+                counts[kind] += 1
+        self.stdout.write(
+            f'Файлов: {counts[""]}, {sizes[""] / 1024:.0f} КиБ'
+        )
+        for suffix in ENCODINGS.values():
+            if counts[suffix]:
+                self.stdout.write(
+                    f'Копий {suffix}: {counts[suffix]}, '
+                    f'{sizes[suffix] / 1024:.0f} КиБ'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Статика собрана в {settings.STATIC_ROOT}'
+        ))
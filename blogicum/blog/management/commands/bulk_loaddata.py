@@ -0,0 +1,62 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from blog.caching import purge_all_pages
+from blog.dumps import BulkLoader, iter_dump_objects, open_dump
+from blog.paginators import invalidate_feed_counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает дамп dumpdata потоково: объекты читаются по одному, '
+        'сохраняются пакетами bulk_create без сигналов, после чего '
+        'пересчитываются счётчики комментариев, анонсы и '
+        'последовательности ключей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Путь к JSON-дампу или JSON Lines (можно .gz).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько объектов одной модели сохранять за раз.',
+        )
+        parser.add_argument(
+            '-e', '--exclude', action='append', default=[],
+            help='Пропустить модель app_label.ModelName '
+                 '(можно указать несколько раз).',
+        )
+
+    def handle(self, *args, **options):
+        loader = BulkLoader(options['batch_size'], options['exclude'])
+        try:
+            stream = open_dump(options['path'])
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть дамп: {error}')
+
+        with stream, transaction.atomic():
+            # Как и loaddata, проверяем внешние ключи один раз в конце:
+            # в дампе объекты могут ссылаться вперёд
+            with connection.constraint_checks_disabled():
+                for number, data in enumerate(iter_dump_objects(stream), 1):
+                    loader.add(data)
+                    if number % 100_000 == 0:
+                        self.stdout.write(f'Прочитано объектов: {number}')
+                loader.flush()
+            connection.check_constraints()
+            loader.reset_sequences()
+
+        for label, count in sorted(loader.counts.items()):
+            self.stdout.write(f'{label}: {count}')
+
+        if any(label.startswith('blog.') for label in loader.counts):
+            call_command('recount_comments', stdout=self.stdout)
+            call_command('backfill_excerpts', stdout=self.stdout)
+            call_command('rebuild_search_index', stdout=self.stdout)
+            invalidate_feed_counts()
+            purge_all_pages()
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {sum(loader.counts.values())}'
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Готовит уменьшенные копии изображений (Post.image_variants) '
+        'для постов, загруженных до их появления.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать копии у всех постов с изображением.',
+        )
+
+    def handle(self, *args, **options):
+        updated = 0
+        posts = Post.objects.exclude(image='').only(
+            'pk', 'image', 'image_variants'
+        ).order_by('pk')
+        for post in posts.iterator(chunk_size=500):
+            try:
+                updated += post.update_image_variants(force=options['all'])
+            except OSError as error:
+                self.stderr.write(f'Пост {post.pk}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено копий изображений: {updated}'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blog.search import backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново строит поисковый индекс постов (FTS5 на SQLite, '
+        'таблица SearchTerm на других базах).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько постов читать из базы за раз.',
+        )
+
+    def handle(self, *args, **options):
+        rebuild_index(options['batch_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'Поисковый индекс ({backend()}) перестроен.'
+        ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованное количество комментариев '
+        '(Post.comment_count) и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Сколько постов пересчитывать за один UPDATE.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            fixed += Post.objects.recount_comments(
+                Post.objects.filter(pk__gte=pks[0], pk__lte=pks[-1])
+            )
+            last_pk = pks[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено постов с неверным счётчиком: {fixed}'
+        ))
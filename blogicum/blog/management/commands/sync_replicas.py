@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blogicum.replicas import replica_aliases, sync_replica
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует базу default в файлы реплик из DATABASE_REPLICAS — '
+        'локальная замена репликации для SQLite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять копирование раз в столько секунд; '
+                 'по умолчанию — один раз.',
+        )
+
+    def handle(self, *args, **options):
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError(
+                'Реплики не настроены: задайте BLOGICUM_REPLICAS.'
+            )
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Команда копирует только базы SQLite.')
+        while True:
+            for alias in aliases:
+                target = settings.DATABASES[alias]['NAME']
+                started = time.perf_counter()
+                sync_replica(target)
+                self.stdout.write(
+                    f'{alias}: {target} обновлена за '
+                    f'{time.perf_counter() - started:.2f} с'
+                )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
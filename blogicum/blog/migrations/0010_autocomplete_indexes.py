@@ -0,0 +1,21 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['title'], name='category_published_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['name'], name='location_published_name_idx'),
+        ),
+    ]
@@ -1,10 +1,16 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models import Count
+from django.utils.text import Truncator
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from . import images
 
 User = get_user_model()
 
+EXCERPT_WORDS = 10
+
 
 class BaseModel(models.Model):
     is_published = models.BooleanField(
@@ -13,11 +19,22 @@ class BaseModel(models.Model):
         help_text='Снимите галочку, чтобы скрыть публикацию.'
     )
     created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = models.DateTimeField(
+        'Изменено',
+        default=timezone.now,
+        editable=False
+    )
 
     class Meta:
         abstract = True
         ordering = ('-created_at',)
 
+    def save(self, *args, **kwargs):
+        # Не auto_now: loaddata сохраняет объекты в raw-режиме без pre_save,
+        # и строкам фикстур без этого поля нужно значение по умолчанию.
+        self.updated_at = timezone.now()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return getattr(self, 'title', getattr(self, 'name', super().__str__()))
 
@@ -40,6 +57,14 @@ class Category(BaseModel):
     class Meta:
         verbose_name = 'категория'
         verbose_name_plural = 'Категории'
+        # Поиск по началу названия в автодополнении (blog.views)
+        indexes = (
+            models.Index(
+                fields=('title',),
+                condition=Q(is_published=True),
+                name='category_published_title_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
@@ -54,6 +79,13 @@ class Location(BaseModel):
     class Meta:
         verbose_name = 'местоположение'
         verbose_name_plural = 'Местоположения'
+        indexes = (
+            models.Index(
+                fields=('name',),
+                condition=Q(is_published=True),
+                name='location_published_name_idx',
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -83,13 +115,64 @@ class PostManager(models.Manager):  # ИЗМЕНЕНО: добавлен кас
 
         return queryset
 
-    # ИЗМЕНЕНО: Добавлен метод with_comments, принимающий queryset
-    def with_comments(self, queryset=None):
-        """Добавляет количество комментариев к переданному queryset"""
+    def filter_visible(self, user, queryset=None):
+        """
+        Фильтрует queryset до постов, которые может видеть пользователь.
+
+        Опубликованные посты видны всем, собственные — автору в любом
+        состоянии. Проверка выполняется в SQL одним условием.
+        """
         if queryset is None:
-            queryset = self.get_queryset()  # По умолчанию - все посты таблицы
+            queryset = self.get_queryset()
+
+        visible = Q(
+            is_published=True,
+            pub_date__lte=timezone.now(),
+            category__is_published=True
+        )
+        if user.is_authenticated:
+            visible |= Q(author=user)
+
+        return queryset.filter(visible)
+
+    def update_comment_count(self, post_id, delta):
+        """
+        Атомарно изменяет счётчик комментариев поста на delta.
+
+        Обновление выполняется одним UPDATE с F(), поэтому параллельные
+        добавления и удаления комментариев не теряют друг друга.
+        Отметка updated_at сдвигается: страница поста изменилась.
+        """
+        return self.filter(pk=post_id).update(
+            comment_count=F('comment_count') + delta,
+            updated_at=timezone.now()
+        )
+
+    def touch(self, post_id):
+        """Сдвигает updated_at поста, например после правки комментария"""
+        return self.filter(pk=post_id).update(updated_at=timezone.now())
+
+    def recount_comments(self, queryset=None):
+        """
+        Пересчитывает comment_count по таблице комментариев.
 
-        return queryset.annotate(comment_count=Count('comments'))
+        Обновляются только разошедшиеся посты; возвращает их количество.
+        """
+        if queryset is None:
+            queryset = self.get_queryset()
+        actual = Subquery(
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        drifted = queryset.annotate(
+            actual_count=Coalesce(actual, 0)
+        ).exclude(comment_count=F('actual_count'))
+        return self.filter(pk__in=drifted.values('pk')).update(
+            comment_count=Coalesce(actual, 0)
+        )
 
     def get_posts_with_comments(self, published_only=True, category=None, author=None):
         """
@@ -99,6 +182,8 @@ class PostManager(models.Manager):  # ИЗМЕНЕНО: добавлен кас
             published_only (bool): Если True, фильтрует только опубликованные посты
             category (Category): Если указана, фильтрует по категории
             author (User): Если указан, фильтрует по автору
+
+        Количество комментариев хранится в поле comment_count.
         """
         qs = self.get_queryset()
 
@@ -115,7 +200,7 @@ class PostManager(models.Manager):  # ИЗМЕНЕНО: добавлен кас
         if author:
             qs = qs.filter(author=author)
 
-        return qs.annotate(comment_count=Count('comments'))
+        return qs
 
 
 class Post(BaseModel):
@@ -124,6 +209,15 @@ class Post(BaseModel):
         max_length=256
     )
     text = models.TextField('Текст')
+    excerpt = models.TextField(
+        'Анонс',
+        blank=True,
+        editable=False,
+        help_text=(
+            'Начало текста для карточки поста; '
+            'заполняется при сохранении.'
+        )
+    )
     pub_date = models.DateTimeField(
         'Дата и время публикации',
         help_text=(
@@ -157,6 +251,17 @@ class Post(BaseModel):
         upload_to='posts_images/',
         blank=True
     )
+    image_variants = models.JSONField(
+        'Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+        editable=False
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
 
     objects = PostManager()
 
@@ -164,10 +269,130 @@ class Post(BaseModel):
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        # Индексы повторяют предикат filter_published и сортировку лент:
+        # общая лента и лента категории читают только опубликованные
+        # посты (частичные индексы), лента автора — все посты автора.
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=Q(is_published=True),
+                name='post_published_feed_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date'),
+                condition=Q(is_published=True),
+                name='post_category_feed_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_feed_idx',
+            ),
+            # Отметка последней правки для условных GET-запросов
+            models.Index(
+                fields=('updated_at',),
+                name='post_updated_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    @property
+    def card_version(self):
+        """
+        Версия отрисованной карточки поста для кэша фрагментов.
+
+        Меняется при правке поста, его категории, местоположения,
+        имени автора и при изменении числа комментариев.
+        """
+        return ':'.join(str(part) for part in (
+            self.updated_at.timestamp(),
+            self.comment_count,
+            self.author.username,
+            self.category.updated_at.timestamp() if self.category else '',
+            self.location.updated_at.timestamp() if self.location else '',
+        ))
+
+    @property
+    def image_sources(self):
+        """
+        Атрибуты <picture> для изображения поста: srcset копий в WebP
+        и JPEG, адрес самой крупной копии JPEG и её размеры. Пока копий
+        нет, используется оригинал.
+        """
+        variants = self.image_variants or {}
+        if variants.get('source') != self.image.name:
+            return {'src': self.image.url}
+        storage = self.image.storage
+        return {
+            'webp': images.srcset(storage, variants, 'webp'),
+            'jpeg': images.srcset(storage, variants, 'jpeg'),
+            'src': storage.url(variants['jpeg'][-1][1]),
+            'width': variants['width'],
+            'height': variants['height'],
+        }
+
+    def update_image_variants(self, force=False):
+        """
+        Пересоздаёт копии изображения, если оно сменилось (или всегда
+        при force), и удаляет копии прежнего изображения.
+
+        Прежние копии удаляются только после того, как новые сохранены
+        и записаны в базу: если подготовка упадёт, пост продолжит
+        ссылаться на существующие файлы.
+
+        Returns:
+            bool: Были ли изменены копии.
+        """
+        variants = self.image_variants or {}
+        source = self.image.name if self.image else None
+        if not force and variants.get('source') == source:
+            return False
+        new_variants = (
+            images.generate_variants(self.image) if self.image else {}
+        )
+        updated_at = timezone.now()
+        type(self).objects.filter(pk=self.pk).update(
+            image_variants=new_variants, updated_at=updated_at
+        )
+        self.image_variants, self.updated_at = new_variants, updated_at
+        images.delete_variants(
+            self._meta.get_field('image').storage, variants,
+            keep=images.variant_names(new_variants),
+        )
+        return True
+
+    def make_excerpt(self):
+        """Анонс в том же виде, что даёт фильтр truncatewords в ленте"""
+        return Truncator(self.text).words(EXCERPT_WORDS, truncate=' …')
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет пост, обновляя анонс.
+
+        Повторное сохранение без явного update_fields не пишет
+        comment_count и image_variants: их меняют только
+        update_comment_count и update_image_variants, а экземпляр,
+        загруженный раньше, затёр бы свежие значения. Чтобы записать
+        эти поля, передайте их в update_fields.
+        """
+        if 'text' not in self.get_deferred_fields():
+            self.excerpt = self.make_excerpt()
+        if (
+            not self._state.adding
+            and self.pk is not None
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            skipped = self.get_deferred_fields() | {
+                'comment_count', 'image_variants'
+            }
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     text = models.TextField('Текст комментария')
@@ -192,6 +417,35 @@ class Comment(models.Model):
         ordering = ('created_at',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx',
+            ),
+        )
 
     def __str__(self):
         return f'Комментарий {self.author} к {self.post}'
+
+
+class SearchTerm(models.Model):
+    """
+    Запись обратного индекса поиска для баз без FTS5 (см. blog.search):
+    терм поста и его вес с учётом заголовка.
+    """
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Публикация'
+    )
+    term = models.CharField('Терм', max_length=64)
+    weight = models.FloatField('Вес')
+
+    class Meta:
+        verbose_name = 'терм поиска'
+        verbose_name_plural = 'Термы поиска'
+        indexes = (
+            models.Index(fields=('term', 'post'), name='search_term_idx'),
+        )
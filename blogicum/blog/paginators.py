@@ -0,0 +1,313 @@
+import base64
+import binascii
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from blogicum.replicas import reading_from_replicas
+
+POSTS_PER_PAGE = 10
+FEED_COUNT_VERSION_KEY = 'blog:feed_count:version'
+
+
+class InvalidCursor(ValueError):
+    """Курсор не удалось разобрать"""
+
+
+class CursorPage:
+    """Страница курсорной пагинации"""
+
+    is_cursor_page = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage: {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset-пагинация по набору полей сортировки.
+
+    Вместо OFFSET страница выбирается условием «после последней строки
+    предыдущей страницы», поэтому глубокие страницы стоят столько же,
+    сколько первая. Курсор — непрозрачная base64-строка с значениями
+    полей сортировки граничной строки и направлением перехода.
+
+    Args:
+        queryset (QuerySet): Набор объектов для постраничного вывода.
+        per_page (int): Количество объектов на странице.
+        ordering (tuple): Поля сортировки; последнее должно быть
+            уникальным (обычно pk), иначе строки с одинаковым ключом
+            могут потеряться на границе страниц.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-pub_date', '-pk')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    @staticmethod
+    def _field_name(field):
+        return field.lstrip('-')
+
+    def _reversed_ordering(self):
+        return tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        )
+
+    def _field_value(self, obj, field):
+        name = self._field_name(field)
+        return obj.pk if name == 'pk' else getattr(obj, name)
+
+    def encode_cursor(self, obj, direction):
+        values = [
+            self._field_value(obj, field) for field in self.ordering
+        ]
+        payload = json.dumps(
+            [direction, [
+                value.isoformat() if hasattr(value, 'isoformat') else value
+                for value in values
+            ]],
+            separators=(',', ':'),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, values = json.loads(
+                base64.urlsafe_b64decode(padded.encode()).decode()
+            )
+        except (ValueError, TypeError, binascii.Error):
+            raise InvalidCursor(cursor)
+        if direction not in ('next', 'prev') or (
+            not isinstance(values, list)
+            or len(values) != len(self.ordering)
+        ):
+            raise InvalidCursor(cursor)
+        model = self.queryset.model
+        decoded = []
+        for field, value in zip(self.ordering, values):
+            name = self._field_name(field)
+            model_field = (
+                model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            )
+            # Значения приходят от посетителя: всё, что поле не примет,
+            # иначе упало бы при построении запроса
+            try:
+                value = model_field.to_python(value)
+            except (ValueError, TypeError, ValidationError):
+                raise InvalidCursor(cursor)
+            if value is None:
+                raise InvalidCursor(cursor)
+            decoded.append(value)
+        return direction, decoded
+
+    def _keyset_filter(self, values, ordering):
+        """Строит условие «строго после values» для заданной сортировки"""
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = self._field_name(field)
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for prev_field, prev_value in zip(ordering[:index], values):
+                step &= Q(**{self._field_name(prev_field): prev_value})
+            condition |= step
+        return condition
+
+    def get_page(self, cursor=None):
+        """
+        Возвращает страницу по курсору.
+
+        Пустой или повреждённый курсор означает первую страницу —
+        так же снисходительно, как Paginator.get_page.
+        """
+        direction, values = 'next', None
+        if cursor:
+            try:
+                direction, values = self.decode_cursor(cursor)
+            except InvalidCursor:
+                direction, values = 'next', None
+
+        ordering = (
+            self.ordering if direction == 'next'
+            else self._reversed_ordering()
+        )
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, ordering))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'prev':
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if direction == 'next':
+                has_next, has_previous = has_more, values is not None
+            else:
+                has_next, has_previous = True, has_more
+            if has_next:
+                next_cursor = self.encode_cursor(rows[-1], 'next')
+            if has_previous:
+                previous_cursor = self.encode_cursor(rows[0], 'prev')
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+def _feed_count_version():
+    version = cache.get(FEED_COUNT_VERSION_KEY)
+    if version is None:
+        cache.add(FEED_COUNT_VERSION_KEY, 1, timeout=None)
+        version = cache.get(FEED_COUNT_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_feed_counts():
+    """Сбрасывает все закэшированные количества постов в лентах"""
+    try:
+        cache.incr(FEED_COUNT_VERSION_KEY)
+    except ValueError:
+        cache.add(FEED_COUNT_VERSION_KEY, 1, timeout=None)
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator, который берёт общее количество объектов из кэша.
+
+    Ключ кэша строится из count_key — кортежа
+    (лента, id категории, id автора, смотрит ли владелец), версии,
+    которую сбрасывает invalidate_feed_counts(), и временной корзины
+    длиной BLOG_FEED_COUNT_CACHE_TIMEOUT секунд: отложенные посты
+    попадают в количество не позже, чем через одну корзину.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        timeout = getattr(settings, 'BLOG_FEED_COUNT_CACHE_TIMEOUT', 60)
+        if self.count_key is None or not timeout:
+            return super().count
+        bucket = int(time.time() // timeout)
+        key = 'blog:feed_count:{}:{}:{}'.format(
+            _feed_count_version(),
+            bucket,
+            ':'.join(str(part) for part in self.count_key),
+        )
+        count = cache.get(key)
+        if count is None:
+            # Количество из отстающей реплики осталось бы в кэше
+            # после сброса — считаем по default
+            with reading_from_replicas(False):
+                count = super().count
+            cache.set(key, count, timeout)
+        return count
+
+
+def estimate_rows(model, using='default'):
+    """
+    Примерное число строк таблицы model по статистике планировщика
+    или None, если статистики нет.
+
+    PostgreSQL — pg_class.reltuples, MySQL — information_schema,
+    SQLite — sqlite_stat1 (заполняется командой ANALYZE).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        'postgresql': 'SELECT reltuples::bigint FROM pg_class '
+                      'WHERE oid = %s::regclass',
+        'mysql': 'SELECT table_rows FROM information_schema.tables '
+                 'WHERE table_schema = DATABASE() AND table_name = %s',
+        # Строки частичных индексов считают только попавшие в индекс
+        # записи; полный индекс или сама таблица дают наибольшее число
+        'sqlite': 'SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 '
+                  'WHERE tbl = %s',
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        # Точка сохранения: ошибка запроса не должна ломать транзакцию
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(queries[connection.vendor], [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator для списков админки по большим таблицам.
+
+    Для нефильтрованного queryset вместо COUNT(*) по всей таблице
+    берётся оценка из статистики базы (estimate_rows), если она больше
+    ADMIN_ESTIMATED_COUNT_THRESHOLD. Отфильтрованные списки и небольшие
+    таблицы считаются точно.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.has_filters():
+            estimate = estimate_rows(queryset.model, queryset.db)
+            threshold = settings.ADMIN_ESTIMATED_COUNT_THRESHOLD
+            if estimate and estimate > threshold:
+                return estimate
+        return super().count
+
+
+def paginate(request, queryset, per_page=POSTS_PER_PAGE, count_key=None):
+    """
+    Возвращает страницу ленты постов для запроса.
+
+    Режим выбирается настройкой BLOG_FEED_PAGINATION: 'page' — обычная
+    постраничная навигация по ?page=, 'cursor' — keyset-пагинация
+    по (pub_date, id) с курсором в ?cursor=. В режиме 'page'
+    count_key включает кэширование общего количества постов
+    (см. CachedCountPaginator).
+    """
+    if getattr(settings, 'BLOG_FEED_PAGINATION', 'page') == 'cursor':
+        return CursorPaginator(queryset, per_page).get_page(
+            request.GET.get('cursor')
+        )
+    return CachedCountPaginator(
+        queryset, per_page, count_key=count_key
+    ).get_page(request.GET.get('page'))
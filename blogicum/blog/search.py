@@ -0,0 +1,156 @@
+"""
+Полнотекстовый поиск по постам.
+
+На SQLite посты индексируются в виртуальной таблице FTS5
+blog_post_fts (rowid = id поста), ранжирование — bm25 с заголовком
+весомее текста. На других базах используется обратный индекс
+в таблице SearchTerm: термы считаются в Python, ранг — сумма tf-idf.
+Индекс обновляют сигналы сохранения и удаления поста (blog.signals).
+"""
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Sum, Value, When
+
+from .models import Post, SearchTerm
+
+FTS_TABLE = 'blog_post_fts'
+# Вес совпадения в заголовке относительно совпадения в тексте
+TITLE_WEIGHT = 10.0
+MIN_TERM_LENGTH = 2
+
+_WORDS = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Термы текста: слова в нижнем регистре, ё приравнена к е"""
+    return [
+        word for word in _WORDS.findall(text.lower().replace('ё', 'е'))
+        if len(word) >= MIN_TERM_LENGTH
+    ]
+
+
+def backend():
+    """'fts5' или 'terms' по настройке BLOG_SEARCH_BACKEND и базе"""
+    choice = getattr(settings, 'BLOG_SEARCH_BACKEND', 'auto')
+    if choice == 'auto':
+        return 'fts5' if connection.vendor == 'sqlite' else 'terms'
+    return choice
+
+
+def index_post(post):
+    """Добавляет пост в индекс или обновляет его запись"""
+    if backend() == 'fts5':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+                f'VALUES (%s, %s, %s)',
+                [post.pk, _normalize(post.title), _normalize(post.text)]
+            )
+        return
+
+    weights = Counter(tokenize(post.text))
+    for term in tokenize(post.title):
+        weights[term] += TITLE_WEIGHT
+    SearchTerm.objects.filter(post_id=post.pk).delete()
+    SearchTerm.objects.bulk_create(
+        SearchTerm(post_id=post.pk, term=term[:64], weight=weight)
+        for term, weight in weights.items()
+    )
+
+
+def remove_post(post_id):
+    """Убирает пост из индекса"""
+    if backend() == 'fts5':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+    # Записи SearchTerm удаляются каскадно вместе с постом
+
+
+def rebuild_index(batch_size=2000, stdout=None):
+    """Переиндексирует все посты (после bulk_create, загрузки дампа)"""
+    if backend() == 'fts5':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    else:
+        SearchTerm.objects.all().delete()
+    posts = Post.objects.only('pk', 'title', 'text').order_by('pk')
+    for number, post in enumerate(posts.iterator(chunk_size=batch_size), 1):
+        index_post(post)
+        if stdout is not None and number % batch_size == 0:
+            stdout.write(f'Проиндексировано постов: {number}')
+
+
+def search_posts(query, queryset=None):
+    """
+    Посты, подходящие под запрос, от самых релевантных.
+
+    Все слова запроса должны встретиться в заголовке или тексте,
+    последнее слово ищется по префиксу (поиск по мере набора).
+    Публикационные правила задаёт переданный queryset, по умолчанию —
+    Post.objects.filter_published().
+    """
+    if queryset is None:
+        queryset = Post.objects.filter_published()
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+    if backend() == 'fts5':
+        return _search_fts(queryset, terms)
+    return _search_terms(queryset, terms)
+
+
+def _normalize(text):
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def _search_fts(queryset, terms):
+    # Каждое слово — строка FTS5 в кавычках: спецсимволы запроса
+    # не могут сломать синтаксис MATCH
+    match = ' '.join(f'"{term}"' for term in terms) + '*'
+    rank = f'bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1.0)'
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = blog_post.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[match],
+        select={'search_rank': rank},
+        order_by=['search_rank', '-pub_date'],
+    )
+
+
+def _search_terms(queryset, terms):
+    *exact, prefix = terms
+    lookups = [Q(term=term) for term in exact] + [
+        Q(term__startswith=prefix)
+    ]
+    total = max(Post.objects.count(), 1)
+    ranked = queryset
+    score = Value(0.0, output_field=FloatField())
+    for lookup in lookups:
+        matching = SearchTerm.objects.filter(lookup)
+        frequency = matching.values('post').distinct().count()
+        idf = math.log(1 + total / max(frequency, 1))
+        ranked = ranked.filter(pk__in=matching.values('post'))
+        score = score + Sum(Case(
+            When(
+                Q(**{f'search_terms__{key}': value
+                     for key, value in lookup.children}),
+                then='search_terms__weight'
+            ),
+            default=0.0,
+            output_field=FloatField(),
+        )) * idf
+    return ranked.annotate(search_rank=score).order_by(
+        '-search_rank', '-pub_date'
+    )
@@ -0,0 +1,201 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from blogicum.auth import forget_user
+from tasks.queue import enqueue
+
+from . import search
+from .caching import purge_all_pages, purge_post_pages
+from .models import Category, Comment, Location, Post
+from .paginators import invalidate_feed_counts
+
+User = get_user_model()
+
+# Посты, ленты которых не сбрасываются на каждый комментарий:
+# удаляемые сейчас вместе с комментариями или обрабатываемые
+# batch_comment_purges
+_skip_comment_purges = contextvars.ContextVar(
+    'blog_skip_comment_purges', default=frozenset()
+)
+
+# Поля пользователя, которые выводятся в лентах
+USER_FEED_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def _post_page_scopes(post_id):
+    """(slug категории, имя автора) поста по данным из базы"""
+    return Post.objects.filter(pk=post_id).values_list(
+        'category__slug', 'author__username'
+    ).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_feed_counts(sender, **kwargs):
+    """Количество постов в лентах меняется вместе с постами и категориями"""
+    invalidate_feed_counts()
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_pages(sender, instance, raw=False, **kwargs):
+    """
+    Запоминает ленты, где пост был до сохранения: он мог сменить
+    категорию
+    """
+    if not raw and instance.pk is not None:
+        instance._previous_page_scopes = _post_page_scopes(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_feeds(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_page_scopes', None)
+    if previous:
+        purge_post_pages(*previous)
+    category = instance.category if instance.category_id else None
+    purge_post_pages(
+        category.slug if category else None,
+        instance.author.username
+    )
+
+
+@receiver(post_save, sender=Post)
+def make_image_variants(sender, instance, raw=False, **kwargs):
+    """Ставит в очередь подготовку копий нового изображения поста"""
+    source = instance.image.name if instance.image else None
+    if not raw and (instance.image_variants or {}).get('source') != source:
+        enqueue('blog.tasks.make_image_variants', instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleting_post(sender, instance, **kwargs):
+    _skip_comment_purges.set(_skip_comment_purges.get() | {instance.pk})
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleting_post(sender, instance, **kwargs):
+    _skip_comment_purges.set(_skip_comment_purges.get() - {instance.pk})
+
+
+@contextmanager
+def batch_comment_purges(post_ids):
+    """
+    Внутри блока изменения комментариев постов post_ids не сбрасывают
+    ленты по одному: после блока ленты каждого поста сбрасываются
+    один раз. Для массовых операций, например удаления в админке.
+    """
+    post_ids = frozenset(post_ids)
+    token = _skip_comment_purges.set(_skip_comment_purges.get() | post_ids)
+    try:
+        yield
+    finally:
+        _skip_comment_purges.reset(token)
+    for scopes in Post.objects.filter(pk__in=post_ids).values_list(
+        'category__slug', 'author__username'
+    ):
+        purge_post_pages(*scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_feeds(sender, instance, raw=False, **kwargs):
+    """Карточки постов в лентах показывают число комментариев"""
+    # Ленты удаляемого поста сбросит purge_post_feeds, а
+    # batch_comment_purges — один раз на пост
+    if raw or instance.post_id in _skip_comment_purges.get():
+        return
+    scopes = _post_page_scopes(instance.post_id)
+    if scopes:
+        purge_post_pages(*scopes)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def purge_feeds_on_reference_change(sender, raw=False, **kwargs):
+    """Названия категорий и мест выводятся в карточках всех лент"""
+    if not raw:
+        purge_all_pages()
+
+
+@receiver(pre_save, sender=User)
+def remember_user_names(sender, instance, raw=False, update_fields=None,
+                        **kwargs):
+    """Запоминает имена пользователя, которые видны в лентах"""
+    if raw or instance.pk is None or (
+        update_fields is not None
+        and not set(update_fields) & set(USER_FEED_FIELDS)
+    ):
+        return
+    instance._previous_feed_names = User.objects.filter(
+        pk=instance.pk
+    ).values_list(*USER_FEED_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def purge_feeds_on_user_change(sender, instance, created=False, raw=False,
+                               **kwargs):
+    """
+    Ленты выводят имя и ник автора: сбрасываем их, только когда эти
+    поля изменились. Регистрация, вход и смена пароля лент не меняют.
+    """
+    previous = instance.__dict__.pop('_previous_feed_names', None)
+    if raw or created or previous is None:
+        return
+    if previous != tuple(getattr(instance, f) for f in USER_FEED_FIELDS):
+        purge_all_pages()
+
+
+@receiver(pre_delete, sender=User)
+def remember_commented_posts(sender, instance, **kwargs):
+    """
+    Запоминает чужие посты с комментариями пользователя: они удалятся
+    каскадом, минуя update_comment_count
+    """
+    instance._commented_post_ids = list(
+        Comment.objects.filter(author=instance)
+        .exclude(post__author=instance)
+        .order_by()
+        .values_list('post', flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_delete, sender=User)
+def recount_commented_posts(sender, instance, **kwargs):
+    post_ids = instance.__dict__.pop('_commented_post_ids', None)
+    if post_ids:
+        Post.objects.recount_comments(Post.objects.filter(pk__in=post_ids))
+        Post.objects.filter(pk__in=post_ids).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    """Пароль, профиль или права изменились — берём пользователя из базы"""
+    forget_user(instance.pk)
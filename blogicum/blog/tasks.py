@@ -0,0 +1,18 @@
+"""Фоновые задачи блога, выполняемые командой run_worker."""
+from .caching import purge_post_pages
+from .models import Post
+
+
+def make_image_variants(post_id):
+    """Готовит уменьшенные копии изображения поста"""
+    post = Post.objects.select_related('author', 'category').filter(
+        pk=post_id
+    ).first()
+    if post is None or not post.update_image_variants():
+        return
+    # update() не отправляет сигналов: ленты с карточкой поста
+    # сбрасываем сами, чтобы в них появился srcset
+    purge_post_pages(
+        post.category.slug if post.category else None,
+        post.author.username,
+    )
@@ -1,15 +1,22 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'blog'
 
+# Ленты и страница поста: асинхронные под ASGI (BLOG_ASYNC_VIEWS)
+feeds = async_views if settings.BLOG_ASYNC_VIEWS else views
+
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('posts/<int:pk>/', views.post_detail, name='post_detail'),
+    path('', feeds.index, name='index'),
+    path('search/', views.search, name='search'),
+    path('posts/<int:pk>/', feeds.post_detail, name='post_detail'),
+    path('posts/<int:pk>/comments/',
+         views.post_comments, name='post_comments'),
     path('category/<slug:category_slug>/',
-         views.category_posts, name='category_posts'),
+         feeds.category_posts, name='category_posts'),
     path('profile/edit/', views.edit_profile, name='edit_profile'),
-    path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/', feeds.profile, name='profile'),
     path('posts/create/', views.create_post, name='create_post'),
     path('posts/<int:post_id>/edit/', views.edit_post, name='edit_post'),
     path('posts/<int:post_id>/delete/', views.delete_post, name='delete_post'),
@@ -19,4 +26,8 @@ urlpatterns = [
     path('posts/<int:post_id>/delete_comment/<int:comment_id>/',
          views.delete_comment, name='delete_comment'),
     path('auth/registration/', views.signup, name='registration'),
+    path('autocomplete/categories/', views.category_autocomplete,
+         name='category_autocomplete'),
+    path('autocomplete/locations/', views.location_autocomplete,
+         name='location_autocomplete'),
 ]
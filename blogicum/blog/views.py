@@ -1,74 +1,157 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.utils import timezone
-from django.db.models import Count
+from django.db import transaction
 from django.contrib.auth import get_user_model
-from .models import Post, Category, Comment
+from .models import Post, Category, Comment, Location
 from .forms import PostForm, CommentForm, CreationForm, EditUserForm
+from .caching import (
+    cache_anonymous_page, conditional_feed, conditional_post
+)
+from .paginators import POSTS_PER_PAGE, CursorPaginator, paginate
+from .search import search_posts
 
 User = get_user_model()
 
 
+@cache_anonymous_page('index')
+@conditional_feed('index')
 def index(request):
     """Главная страница - 10 последних опубликованных постов с пагинацией"""
     post_list = Post.objects.filter_published()  # published_only=True по умолчанию
-    post_list = Post.objects.with_comments(post_list)  # Добавляем количество комментариев
     post_list = post_list.select_related(
         'author', 'location', 'category'
-    ).order_by(*Post._meta.ordering)
+    ).defer('text').order_by(*Post._meta.ordering)
 
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(
+        request, post_list, count_key=('index', None, None, False)
+    )
 
     return render(request, 'blog/index.html', {'page_obj': page_obj})
 
 
+def search(request):
+    """Поиск по опубликованным постам с ранжированием по релевантности"""
+    query = request.GET.get('q', '').strip()
+    posts = search_posts(query).select_related(
+        'author', 'location', 'category'
+    ).defer('text')
+    page_obj = Paginator(posts, POSTS_PER_PAGE).get_page(
+        request.GET.get('page')
+    )
+    return render(request, 'blog/search.html', {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}),
+    })
+
+
+AUTOCOMPLETE_PER_PAGE = 20
+
+
+def _autocomplete(request, queryset, field):
+    """
+    Варианты для AutocompleteSelect: JSON
+    {"results": [{"id": ..., "text": ...}], "more": bool}.
+
+    Поиск по началу названия идёт диапазоном field >= q AND field < q + \uffff,
+    чтобы использовать индекс; проверяется введённый регистр и
+    вариант с заглавной первой буквой.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    if query:
+        prefixes = {query, query[:1].upper() + query[1:]}
+        condition = Q()
+        for prefix in prefixes:
+            condition |= Q(**{
+                f'{field}__gte': prefix, f'{field}__lt': prefix + '\uffff'
+            })
+        queryset = queryset.filter(condition)
+    start = (page - 1) * AUTOCOMPLETE_PER_PAGE
+    rows = list(
+        queryset.order_by(field, 'pk').values_list('pk', field)[
+            start:start + AUTOCOMPLETE_PER_PAGE + 1
+        ]
+    )
+    return JsonResponse({
+        'results': [
+            {'id': pk, 'text': text}
+            for pk, text in rows[:AUTOCOMPLETE_PER_PAGE]
+        ],
+        'more': len(rows) > AUTOCOMPLETE_PER_PAGE,
+    })
+
+
+@login_required
+def category_autocomplete(request):
+    """Опубликованные категории для поля формы поста"""
+    return _autocomplete(
+        request, Category.objects.filter(is_published=True), 'title'
+    )
+
+
+@login_required
+def location_autocomplete(request):
+    """Опубликованные местоположения для поля формы поста"""
+    return _autocomplete(
+        request, Location.objects.filter(is_published=True), 'name'
+    )
+
+
+def _comments_page(request, post):
+    """Страница комментариев поста по курсору (created_at, id)"""
+    return CursorPaginator(
+        post.comments.select_related('author'),
+        settings.BLOG_COMMENTS_PER_PAGE,
+        ordering=('created_at', 'pk')
+    ).get_page(request.GET.get('cursor'))
+
+
+@conditional_post
 def post_detail(request, pk):
     """Страница отдельной публикации"""
-    # ПЕРВЫЙ вызов get_object_or_404: извлекаем пост по ключу из полной таблицы
-    post = get_object_or_404(Post, pk=pk)
-    
-    # Проверяем, является ли пользователь автором
-    if request.user == post.author:
-        # Автор может видеть свой пост даже если он не опубликован
-        comments = post.comments.all().order_by('created_at')
-        form = CommentForm()
-        
-        context = {
-            'post': post,
-            'comments': comments,
-            'form': form
-        }
-        return render(request, 'blog/detail.html', context)
-    else:
-        # ВТОРОЙ вызов get_object_or_404: для не-авторов проверяем опубликованность
-        # Пытаемся получить тот же пост, но с условиями публикации
-        try:
-            published_post = get_object_or_404(
-                Post.objects.filter(
-                    is_published=True,
-                    pub_date__lte=timezone.now(),
-                    category__is_published=True
-                ),
-                pk=pk
-            )
-        except:
-            # Если пост не найден в опубликованных, возвращаем 404
-            return render(request, 'pages/404.html', status=404)
-        
-        comments = published_post.comments.all().order_by('created_at')
-        form = CommentForm()
-        
-        context = {
-            'post': published_post,
-            'comments': comments,
-            'form': form
-        }
-        return render(request, 'blog/detail.html', context)
+    # Один запрос за постом с автором, категорией и местоположением;
+    # видимость (опубликован или свой) проверяется в SQL.
+    # Первая порция комментариев с авторами — вторым запросом,
+    # остальные догружаются через post_comments.
+    post = get_object_or_404(
+        Post.objects.filter_visible(request.user)
+        .select_related('author', 'category', 'location'),
+        pk=pk
+    )
+
+    context = {
+        'post': post,
+        'comments': _comments_page(request, post),
+        'form': CommentForm()
+    }
+    return render(request, 'blog/detail.html', context)
+
+
+@conditional_post
+def post_comments(request, pk):
+    """HTML-фрагмент со следующей порцией комментариев поста"""
+    post = get_object_or_404(
+        Post.objects.filter_visible(request.user).only('pk'),
+        pk=pk
+    )
+    return render(request, 'includes/comment_list.html', {
+        'post': post,
+        'comments': _comments_page(request, post)
+    })
 
 
+@cache_anonymous_page('category', 'category_slug')
+@conditional_feed('category', 'category_slug')
 def category_posts(request, category_slug):
     """Страница категории"""
     category = get_object_or_404(
@@ -80,13 +163,13 @@ def category_posts(request, category_slug):
     posts_from_category = category.posts.all()
     # Затем фильтруем по опубликованности
     post_list = Post.objects.filter_published(posts_from_category, published_only=True)
-    # Добавляем количество комментариев
-    post_list = Post.objects.with_comments(post_list)
-    post_list = post_list.select_related('author', 'location', 'category').order_by(*Post._meta.ordering)
+    post_list = post_list.select_related(
+        'author', 'location', 'category'
+    ).defer('text').order_by(*Post._meta.ordering)
 
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(
+        request, post_list, count_key=('category', category.pk, None, False)
+    )
 
     context = {
         'category': category,
@@ -95,19 +178,22 @@ def category_posts(request, category_slug):
     return render(request, 'blog/category.html', context)
 
 
+@cache_anonymous_page('author', 'username')
+@conditional_feed('author', 'username')
 def profile(request, username):
     """Страница профиля пользователя"""
     user = get_object_or_404(User, username=username)
     published_only = (request.user != user)
     authors_posts = user.posts.all()  # ✅ Используем обратную связь
     posts = Post.objects.filter_published(authors_posts, published_only=published_only)
-    # Добавляем количество комментариев
-    posts = Post.objects.with_comments(posts)
-    posts = posts.select_related('category', 'location', 'author').order_by(*Post._meta.ordering)
+    posts = posts.select_related(
+        'category', 'location', 'author'
+    ).defer('text').order_by(*Post._meta.ordering)
 
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(
+        request, posts,
+        count_key=('profile', None, user.pk, not published_only)
+    )
     return render(request, 'blog/profile.html', {
         'profile': user,
         'page_obj': page_obj
@@ -170,7 +256,9 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            Post.objects.update_comment_count(post.pk, 1)
     
     return redirect('blog:post_detail', pk=post_id)
 
@@ -187,6 +275,7 @@ def edit_comment(request, post_id, comment_id):
     
     if form.is_valid():
         form.save()
+        Post.objects.touch(post_id)
         return redirect('blog:post_detail', pk=post_id)
     
     return render(request, 'blog/comment.html', {
@@ -205,7 +294,9 @@ def delete_comment(request, post_id, comment_id):
         return redirect('blog:post_detail', pk=post_id)
 
     if request.method == 'POST':
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()
+            Post.objects.update_comment_count(post_id, -1)
         return redirect('blog:post_detail', pk=post_id)
 
     return render(request, 'blog/comment.html', {
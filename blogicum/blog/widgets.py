@@ -0,0 +1,46 @@
+from django import forms
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Выпадающий список, который выводит только выбранное значение.
+
+    Остальные варианты подгружает static/js/autocomplete.js из
+    JSON-адреса url_name по мере набора. Проверка значения остаётся
+    за полем формы: ModelChoiceField ищет его в своём queryset.
+    """
+
+    class Media:
+        js = ('js/autocomplete.js',)
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse(
+            self.url_name
+        )
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = {str(item) for item in value if item not in ('', None)}
+        choices = []
+        if field.empty_label is not None:
+            choices.append(('', field.empty_label))
+        if selected:
+            choices += [
+                (obj.pk, field.label_from_instance(obj))
+                for obj in field.queryset.filter(pk__in=selected)
+            ]
+        return [
+            (None, [self.create_option(
+                name, option_value, label,
+                str(option_value) in selected or not selected,
+                index, attrs=attrs,
+            )], index)
+            for index, (option_value, label) in enumerate(choices)
+        ]
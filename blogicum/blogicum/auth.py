@@ -0,0 +1,44 @@
+"""
+Пользователь запроса без обращения к базе.
+
+CachedModelBackend отдаёт пользователя сессии из кэша
+AUTH_USER_CACHE_ALIAS. Запись сбрасывается при любом сохранении
+или удалении пользователя (blog.signals): смене пароля, правке
+профиля, входе в систему. В кэше лежит и хэш пароля — по нему
+Django сверяет сессию, — поэтому кэш должен быть закрытым, как база.
+
+QuerySet.update() сигналов не отправляет: после массовой правки
+пользователей (например, is_active=False) вызовите forget_user для
+каждого из них, иначе старая запись живёт до AUTH_USER_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def _cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def _key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def forget_user(user_id):
+    """Сбрасывает закэшированного пользователя"""
+    _cache().delete(_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который кэширует пользователя по его id"""
+
+    def get_user(self, user_id):
+        cache = _cache()
+        key = _key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,153 @@
+"""Метрики процесса в текстовом формате Prometheus."""
+import ipaddress
+import threading
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"')
+        )
+        for name, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+class Counter:
+    """Монотонный счётчик с метками"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f'{self.name}{_format_labels(labels)} {value}'
+
+
+class Histogram:
+    """Гистограмма с накопительными корзинами, как в клиенте Prometheus"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total, observations = self._values.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value, observations + 1)
+
+    def count(self, **labels):
+        value = self._values.get(tuple(sorted(labels.items())))
+        return value[2] if value else 0
+
+    def samples(self):
+        with self._lock:
+            items = [
+                (labels, list(counts), total, observations)
+                for labels, (counts, total, observations)
+                in self._values.items()
+            ]
+        for labels, counts, total, observations in items:
+            bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, counts + [observations]):
+                bucket_labels = labels + (('le', bound),)
+                yield (
+                    f'{self.name}_bucket{_format_labels(bucket_labels)} '
+                    f'{count}'
+                )
+            yield f'{self.name}_sum{_format_labels(labels)} {total}'
+            yield f'{self.name}_count{_format_labels(labels)} {observations}'
+
+
+class Registry:
+    """Набор метрик процесса"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation):
+        return self.register(Counter(name, documentation))
+
+    def histogram(self, name, documentation, buckets):
+        return self.register(Histogram(name, documentation, buckets))
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def metrics_allowed(request):
+    """
+    Можно ли отдать метрики: адрес клиента входит в одну из сетей
+    METRICS_ALLOWED_NETWORKS или запрос пришёл от сотрудника (is_staff).
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics_view(request):
+    """
+    Отдаёт метрики процесса для сборщика Prometheus.
+
+    Остальным посетителям адрес отвечает 404: по метрикам видны
+    маршруты и нагрузка сайта.
+    """
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(
+        REGISTRY.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
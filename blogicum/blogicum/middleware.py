@@ -0,0 +1,460 @@
+import asyncio
+import contextvars
+import logging
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .metrics import REGISTRY
+from .replicas import read_from_replicas, replica_aliases
+from .storage import index_static_files, static_url_prefix
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'blogicum_request_duration_seconds',
+    'Полное время обработки запроса представлением.',
+    LATENCY_BUCKETS,
+)
+DB_QUERIES = REGISTRY.histogram(
+    'blogicum_request_db_queries',
+    'Количество SQL-запросов на один HTTP-запрос.',
+    QUERY_BUCKETS,
+)
+DB_TIME = REGISTRY.histogram(
+    'blogicum_request_db_duration_seconds',
+    'Суммарное время SQL-запросов на один HTTP-запрос.',
+    LATENCY_BUCKETS,
+)
+TEMPLATE_TIME = REGISTRY.histogram(
+    'blogicum_request_template_duration_seconds',
+    'Время отрисовки шаблонов на один HTTP-запрос.',
+    LATENCY_BUCKETS,
+)
+
+logger = logging.getLogger('blogicum.nplusone')
+
+_current_timings = contextvars.ContextVar('blogicum_timings', default=None)
+# Сборщики SQL-запросов текущего HTTP-запроса (см. collect_queries)
+_collectors = contextvars.ContextVar('blogicum_query_collectors', default=())
+
+
+class RequestTimings:
+    """Счётчики одного запроса: SQL и шаблоны"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+def current_timings():
+    """Счётчики текущего запроса или None вне MetricsMiddleware"""
+    return _current_timings.get()
+
+
+class HybridMiddleware:
+    """
+    Основа middleware, работающего и под WSGI, и под ASGI.
+
+    Наследник определяет два метода с одной логикой: handle(request) —
+    синхронный, вызывает self.get_response(request), и корутину
+    __acall__(request), которая ждёт await self.get_response(request).
+    Если следующий обработчик асинхронный, вызов уходит в __acall__,
+    и Django не переключает запрос между потоком и циклом событий
+    на каждом слое.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Так Django 3.2 узнаёт асинхронный middleware
+            # (как в django.utils.deprecation.MiddlewareMixin)
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.handle(request)
+
+
+def _dispatch(execute, sql, params, many, context):
+    """Пропускает запрос через сборщики текущего контекста"""
+    for collector in reversed(_collectors.get()):
+        execute = partial(collector, execute)
+    return execute(sql, params, many, context)
+
+
+def _install(connection):
+    # В начало списка: execute_wrapper() снимает обёртки с конца
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _dispatch)
+
+
+@receiver(connection_created)
+def _install_on_connect(sender, connection, **kwargs):
+    _install(connection)
+
+
+def install_query_collectors():
+    """
+    Подключает сборщики запросов к соединениям текущего потока.
+
+    Обёртка у соединения одна и постоянная, а сборщики конкретного
+    HTTP-запроса она берёт из contextvar. Поэтому запросы, которые
+    под ASGI выполняются в общем потоке синхронного кода, не видят
+    и не снимают сборщики друг друга. Новые соединения получают
+    обёртку сами; вызывать нужно в потоке, где соединение уже было
+    открыто раньше.
+    """
+    for alias in connections:
+        _install(connections[alias])
+
+
+@contextmanager
+def collect_queries(collector):
+    """
+    Передаёт collector (обёртку в формате execute_wrapper) все
+    запросы к базам, выполненные в текущем контексте внутри блока,
+    в том числе из sync_to_async.
+    """
+    token = _collectors.set(_collectors.get() + (collector,))
+    try:
+        yield collector
+    finally:
+        _collectors.reset(token)
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Собирает по каждому имени маршрута количество SQL-запросов, время
+    в базе, время отрисовки шаблонов и полное время ответа.
+
+    Гистограммы отдаются на /metrics/ (blogicum.metrics). При
+    METRICS_SERVER_TIMING те же цифры пишутся в заголовок Server-Timing.
+    """
+
+    def handle(self, request):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            install_query_collectors()
+            with collect_queries(timings):
+                response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.observe(request, response, timings, started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            # Контекст переходит в sync_to_async вместе с запросом:
+            # счётчик увидит запросы из потока синхронного кода
+            with collect_queries(timings):
+                response = await self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.observe(request, response, timings, started)
+
+    def observe(self, request, response, timings, started):
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        REQUEST_LATENCY.observe(total, view=view)
+        DB_QUERIES.observe(timings.queries, view=view)
+        DB_TIME.observe(timings.db_time, view=view)
+        TEMPLATE_TIME.observe(timings.template_time, view=view)
+
+        if getattr(settings, 'METRICS_SERVER_TIMING', False):
+            response['Server-Timing'] = (
+                f'db;dur={timings.db_time * 1000:.1f};'
+                f'desc="{timings.queries} queries", '
+                f'tpl;dur={timings.template_time * 1000:.1f}, '
+                f'total;dur={total * 1000:.1f}'
+            )
+        return response
+
+
+class NPlusOneError(AssertionError):
+    """Один и тот же запрос повторился за HTTP-запрос слишком много раз"""
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)')
+
+
+def fingerprint(sql):
+    """
+    Форма запроса: SQL без литералов, с одним заполнителем вместо
+    списков IN (...) и без лишних пробелов. Запросы, различающиеся
+    только параметрами, получают одну форму.
+    """
+    shape = _LITERALS.sub('?', sql)
+    shape = _PLACEHOLDER_LISTS.sub('(?)', shape)
+    return ' '.join(shape.split())
+
+
+class QueryShapes:
+    """
+    Считает формы выполненных SELECT-запросов и помнит, откуда они
+    пришли. Запись не учитывается: повторные INSERT и UPDATE по одному
+    на объект (например, журнал админки при массовом действии) — не
+    ленивые загрузки.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() == 'SELECT':
+            shape = fingerprint(sql)
+            self.counts[shape] += 1
+            if self.counts[shape] == 2:
+                self.origins[shape] = ''.join(
+                    traceback.format_stack(limit=12)[:-1]
+                )
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        """Формы, выполненные больше threshold раз"""
+        return [
+            (shape, count) for shape, count in self.counts.most_common()
+            if count > threshold
+        ]
+
+    def report(self, threshold, where):
+        lines = [f'N+1 запросы в {where} (порог {threshold}):']
+        for shape, count in self.repeated(threshold):
+            lines.append(f'{count} x {shape}')
+            lines.append(self.origins.get(shape, ''))
+        return '\n'.join(lines)
+
+
+@contextmanager
+def detect_repeated_queries(threshold=None, where='блоке кода'):
+    """
+    Выполняет блок, считая формы запросов ко всем базам, и падает
+    с NPlusOneError, если какая-то форма повторилась больше threshold
+    раз (по умолчанию NPLUSONE_THRESHOLD).
+    """
+    if threshold is None:
+        threshold = settings.NPLUSONE_THRESHOLD
+    install_query_collectors()
+    with collect_queries(QueryShapes()) as shapes:
+        yield shapes
+    if shapes.repeated(threshold):
+        raise NPlusOneError(shapes.report(threshold, where))
+
+
+class NPlusOneMiddleware(HybridMiddleware):
+    """
+    Ищет N+1: одинаковые по форме SELECT-запросы, повторённые в пределах
+    одного HTTP-запроса больше NPLUSONE_THRESHOLD раз.
+
+    Режим задаёт NPLUSONE_DETECTOR: None — выключен, 'log' — пишет
+    предупреждение в логгер blogicum.nplusone (для стенда), 'raise' —
+    бросает NPlusOneError (для тестов).
+    """
+
+    def handle(self, request):
+        mode = getattr(settings, 'NPLUSONE_DETECTOR', None)
+        if not mode:
+            return self.get_response(request)
+        install_query_collectors()
+        with collect_queries(QueryShapes()) as shapes:
+            response = self.get_response(request)
+        return self.check(request, response, shapes, mode)
+
+    async def __acall__(self, request):
+        mode = getattr(settings, 'NPLUSONE_DETECTOR', None)
+        if not mode:
+            return await self.get_response(request)
+        with collect_queries(QueryShapes()) as shapes:
+            response = await self.get_response(request)
+        return self.check(request, response, shapes, mode)
+
+    def check(self, request, response, shapes, mode):
+        threshold = settings.NPLUSONE_THRESHOLD
+        if shapes.repeated(threshold):
+            report = shapes.report(
+                threshold, f'{request.method} {request.get_full_path()}'
+            )
+            if mode == 'raise':
+                raise NPlusOneError(report)
+            logger.warning(report)
+        return response
+
+
+class ReplicaMiddleware(HybridMiddleware):
+    """
+    Включает чтение из реплик (blogicum.replicas) для GET- и
+    HEAD-запросов к представлениям блога.
+
+    Успешный ответ на запрос, меняющий данные, ставит cookie
+    REPLICA_PIN_COOKIE на REPLICA_PIN_SECONDS: пока она есть,
+    посетитель читает из default и видит собственные изменения.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD')
+
+    def handle(self, request):
+        self.prepare(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replicas(False)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        self.prepare(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_from_replicas(False)
+        return self.pin(request, response)
+
+    def prepare(self, request):
+        request.use_replicas = (
+            request.method in self.SAFE_METHODS
+            and settings.REPLICA_PIN_COOKIE not in request.COOKIES
+            and bool(replica_aliases())
+        )
+
+    def pin(self, request, response):
+        # Ошибка или отказ ничего не записали — читать из default незачем
+        if request.method not in self.SAFE_METHODS and (
+            response.status_code < 400
+        ):
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.use_replicas and (
+            request.resolver_match.namespace in settings.REPLICA_VIEWS
+        ):
+            read_from_replicas(True)
+
+
+# Файлы с хэшем в имени не меняются: браузер кэширует их на год
+# и не перепроверяет
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STATIC_CACHE_CONTROL = 'public, max-age=60'
+
+
+def _accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме отключённых через q=0"""
+    accepted = set()
+    for part in header.split(','):
+        encoding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware(HybridMiddleware):
+    """
+    Отдаёт собранную статику из STATIC_ROOT, не доходя до остальных
+    middleware и представлений.
+
+    Файлы с хэшем в имени (ManifestStaticFilesStorage) получают
+    Cache-Control на год с immutable, остальные — на минуту. Если
+    клиент принимает br или gzip, отдаётся заранее сжатая копия
+    (blogicum.storage). Список файлов читается при запуске процесса:
+    collectstatic выполняется до старта сервера.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        prefix = static_url_prefix()
+        root = settings.STATIC_ROOT
+        if prefix is None or not root or not os.path.isdir(root):
+            self.files = {}
+            return
+        self.files = index_static_files(
+            root, prefix,
+            getattr(staticfiles_storage, 'hashed_files', {}).values(),
+        )
+
+    def handle(self, request):
+        response = self.serve(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await sync_to_async(
+            self.serve, thread_sensitive=False
+        )(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def serve(self, request):
+        asset = self.files.get(request.path_info)
+        if asset is None or request.method not in ('GET', 'HEAD'):
+            return None
+        accepted = _accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        encoding = next(
+            (name for name in asset.encodings if name in accepted), None
+        )
+        # У сжатой копии свой ETag: это другое представление файла
+        etag = f'{asset.etag[:-1]}-{encoding}"' if encoding else asset.etag
+        response = get_conditional_response(
+            request, etag=etag, last_modified=asset.last_modified
+        )
+        if response is None:
+            path = asset.encodings[encoding] if encoding else asset.path
+            response = FileResponse(
+                open(path, 'rb'), content_type=asset.content_type
+            )
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(asset.last_modified)
+        response['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if asset.immutable
+            else STATIC_CACHE_CONTROL
+        )
+        if asset.encodings:
+            response['Vary'] = 'Accept-Encoding'
+        return response
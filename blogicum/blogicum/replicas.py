@@ -0,0 +1,151 @@
+"""
+Чтение из реплик базы данных.
+
+Реплики перечислены в DATABASE_REPLICAS. ReplicaMiddleware включает
+их на время GET- и HEAD-запросов к представлениям блога; тогда
+ReplicaRouter отправляет чтение моделей из REPLICA_APPS на реплику,
+выбранную для запроса по кругу среди исправных. Запись, прочие
+приложения (пользователи, сессии) и все остальные запросы работают
+с default.
+
+После запроса, меняющего данные, посетитель REPLICA_PIN_SECONDS
+читает из default (cookie REPLICA_PIN_COOKIE): реплика могла ещё
+не получить его пост или комментарий. Страницы и количества постов,
+которые кладутся в общий кэш (blog.caching, blog.paginators),
+всегда читаются из default.
+"""
+import contextvars
+import itertools
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+# Реплика, из которой читает текущий запрос
+_read_alias = contextvars.ContextVar('blogicum_read_alias', default=None)
+_turn = itertools.count()
+# Псевдоним реплики -> (исправна ли, время проверки)
+_health = {}
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def _replicated_tables():
+    return [
+        model._meta.db_table
+        for label in settings.REPLICA_APPS
+        for model in apps.get_app_config(label).get_models()
+    ]
+
+
+def is_healthy(alias):
+    """
+    Читаются ли на реплике таблицы приложений из REPLICA_APPS.
+
+    SELECT 1 не годится: SQLite молча создаёт пустую базу на месте
+    отсутствующего файла, и непроинициализированная реплика выглядела
+    бы исправной. Результат запоминается на
+    REPLICA_HEALTH_CHECK_INTERVAL секунд, чтобы не проверять реплику
+    на каждый запрос.
+    """
+    now = time.monotonic()
+    healthy, checked_at = _health.get(alias, (None, 0.0))
+    if healthy is not None and (
+        now - checked_at < settings.REPLICA_HEALTH_CHECK_INTERVAL
+    ):
+        return healthy
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            for table in _replicated_tables():
+                cursor.execute(
+                    f'SELECT 1 FROM {connection.ops.quote_name(table)} '
+                    f'LIMIT 1'
+                )
+        healthy = True
+    except DatabaseError:
+        connection.close()
+        healthy = False
+    _health[alias] = (healthy, now)
+    return healthy
+
+
+def choose_replica():
+    """Следующая по кругу исправная реплика или None"""
+    aliases = replica_aliases()
+    if not aliases:
+        return None
+    start = next(_turn)
+    for offset in range(len(aliases)):
+        alias = aliases[(start + offset) % len(aliases)]
+        if is_healthy(alias):
+            return alias
+    return None
+
+
+def read_from_replicas(enabled):
+    """
+    Включает или выключает чтение из реплик в текущем контексте.
+
+    Реплика выбирается один раз: все чтения запроса видят один и тот же
+    снимок данных. Возвращает выбранный псевдоним или None.
+    """
+    alias = choose_replica() if enabled else None
+    _read_alias.set(alias)
+    return alias
+
+
+@contextmanager
+def reading_from_replicas(enabled=True):
+    """Включает (или выключает) чтение из реплик внутри блока"""
+    token = _read_alias.set(_read_alias.get())
+    try:
+        yield read_from_replicas(enabled)
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Отправляет чтение моделей блога на реплику, остальное — в default"""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None:
+            return None
+        if model._meta.app_label not in settings.REPLICA_APPS:
+            # Без явного ответа Django взял бы базу объекта-подсказки,
+            # и автор поста из реплики тоже читался бы из неё
+            return 'default'
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default: объекты из них можно связывать
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики вместе с данными (sync_replica)
+        return db not in replica_aliases()
+
+
+def sync_replica(target):
+    """
+    Копирует базу default в файл target онлайн-бэкапом SQLite.
+
+    Локальная замена репликации: на PostgreSQL или MySQL реплики
+    наполняет сама СУБД, а эта функция не нужна.
+    """
+    connection = connections['default']
+    connection.ensure_connection()
+    destination = sqlite3.connect(str(target))
+    try:
+        connection.connection.backup(destination)
+    finally:
+        destination.close()
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -32,6 +35,7 @@ AALLOWED_HOSTS = ['localhost', '127.0.0.1', 'testserver']
 INSTALLED_APPS = [
     'blog.apps.BlogConfig',
     'pages.apps.PagesConfig',
+    'tasks.apps.TasksConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -42,11 +46,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blogicum.middleware.MetricsMiddleware',
+    'blogicum.middleware.NPlusOneMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blogicum.middleware.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,7 +64,7 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'blogicum.template_backends.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,6 +80,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
+# Асинхронные ленты и страница поста (blog.async_views). Под WSGI
+# каждый такой запрос запускал бы свой цикл событий, поэтому их
+# включает только профиль blogicum.settings_asgi
+BLOG_ASYNC_VIEWS = False
+
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -84,6 +96,54 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения лент и страниц постов (blogicum.replicas).
+# BLOGICUM_REPLICAS — сколько локальных копий db.sqlite3 подключить;
+# наполняет их команда sync_replicas. В тестах реплики — зеркала default.
+DATABASE_REPLICAS = []
+for number in range(1, int(os.getenv('BLOGICUM_REPLICAS', '0')) + 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db_replica_{number}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+# PRAGMA для каждого нового соединения SQLite (blogicum.sqlite);
+# настройки для боевого сервера — в blogicum.settings_production
+SQLITE_PRAGMAS = {}
+
+DATABASE_ROUTERS = ['blogicum.replicas.ReplicaRouter']
+# Модели каких приложений читать из реплик и для каких пространств
+# имён URL включать реплики (только GET и HEAD)
+REPLICA_APPS = ('blog',)
+REPLICA_VIEWS = ('blog',)
+# Сколько секунд после записи посетитель читает из default
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'read_primary'
+# Как часто перепроверять, отвечает ли реплика
+REPLICA_HEALTH_CHECK_INTERVAL = 5
+
+
+# Сессии (BLOGICUM_SESSIONS): db — таблица django_session, cached_db —
+# кэш SESSION_CACHE_ALIAS с записью в базу, signed_cookies — подписанная
+# cookie без хранилища на сервере. У signed_cookies выход из системы
+# не отзывает выданную cookie: она действует до истечения срока,
+# все сессии пользователя сбрасывает только смена пароля.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.getenv('BLOGICUM_SESSIONS', 'cached_db')]
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Пользователь запроса берётся из кэша (blogicum.auth) и сбрасывается
+# при сохранении пользователя
+AUTHENTICATION_BACKENDS = ['blogicum.auth.CachedModelBackend']
+AUTH_USER_CACHE_ALIAS = 'sessions'
+AUTH_USER_CACHE_TIMEOUT = 15 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -125,6 +185,10 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Сюда собирает статику команда build_static (collectstatic с хэшами
+# в именах и сжатыми копиями); отдаёт её StaticFilesMiddleware
+STATIC_ROOT = BASE_DIR / 'static_build'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -142,3 +206,122 @@ LOGOUT_REDIRECT_URL = 'blog:index'
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = 'blog:index'
 LOGOUT_REDIRECT_URL = 'blog:index'
+
+# Режим пагинации лент: 'page' — номера страниц (?page=),
+# 'cursor' — keyset-пагинация по (pub_date, id) с курсором в ?cursor=
+BLOG_FEED_PAGINATION = 'page'
+
+# Сколько секунд держать в кэше количество постов ленты для пагинатора;
+# 0 — считать на каждый запрос
+BLOG_FEED_COUNT_CACHE_TIMEOUT = 60
+
+# Сколько комментариев выводить на странице поста сразу и догружать
+# за один запрос к blog:post_comments
+BLOG_COMMENTS_PER_PAGE = 50
+
+# Кэш целых страниц лент для анонимных посетителей (blog.caching).
+# Бэкенд выбирается переменной окружения BLOGICUM_PAGE_CACHE:
+# locmem (по умолчанию, свой у каждого процесса), file или redis
+# (нужен пакет django-redis, адрес — в BLOGICUM_REDIS_URL). При нескольких
+# процессах нужен общий бэкенд, иначе сброс дойдёт только до одного из них.
+PAGE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blog-pages',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'pages',
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get(
+            'BLOGICUM_REDIS_URL', 'redis://127.0.0.1:6379/1'
+        ),
+    },
+}
+
+# Кэш сессий и пользователей (blogicum.auth). Как и для страниц, при
+# нескольких процессах нужен общий бэкенд (BLOGICUM_SESSION_CACHE):
+# иначе выход или смена пароля не дойдут до других процессов
+SESSION_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'sessions',
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get(
+            'BLOGICUM_REDIS_URL', 'redis://127.0.0.1:6379/1'
+        ),
+        'KEY_PREFIX': 'sessions',
+    },
+}
+
+
+def _cache_backend(backends, variable, default='locmem'):
+    """Бэкенд кэша, выбранный переменной окружения variable"""
+    name = os.environ.get(variable, default)
+    if name not in backends:
+        raise ImproperlyConfigured(
+            f'{variable}={name!r}: допустимые значения — '
+            f'{", ".join(backends)}'
+        )
+    return backends[name]
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': _cache_backend(PAGE_CACHE_BACKENDS, 'BLOGICUM_PAGE_CACHE'),
+    'sessions': _cache_backend(
+        SESSION_CACHE_BACKENDS, 'BLOGICUM_SESSION_CACHE'
+    ),
+}
+
+BLOG_PAGE_CACHE_ALIAS = 'pages'
+# Максимальное время жизни страницы в секундах; 0 — не кэшировать
+BLOG_PAGE_CACHE_TIMEOUT = 300
+
+# Добавлять ли к ответам заголовок Server-Timing с временем SQL,
+# шаблонов и всего запроса (blogicum.middleware.MetricsMiddleware)
+METRICS_SERVER_TIMING = DEBUG
+
+# Сети, из которых доступен /metrics/ (адреса или CIDR через запятую
+# в BLOGICUM_METRICS_NETWORKS); сотрудникам адрес доступен всегда.
+# За прокси REMOTE_ADDR — адрес прокси: закройте /metrics/ на нём.
+METRICS_ALLOWED_NETWORKS = os.getenv(
+    'BLOGICUM_METRICS_NETWORKS', '127.0.0.1/32,::1/128'
+).split(',')
+
+# Поиск N+1 запросов (blogicum.middleware.NPlusOneMiddleware):
+# None — выключен, 'log' — предупреждение в лог, 'raise' — исключение.
+# Срабатывает, когда запрос одной формы повторился больше
+# NPLUSONE_THRESHOLD раз за HTTP-запрос.
+NPLUSONE_DETECTOR = os.getenv('BLOGICUM_NPLUSONE') or None
+NPLUSONE_THRESHOLD = 3
+
+# Фоновые задачи (приложение tasks, команда run_worker)
+# TASKS_EAGER выполняет задачу сразу после фиксации транзакции,
+# без отдельного обработчика — удобно для локальной разработки.
+TASKS_EAGER = False
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_BASE_DELAY = 10
+TASKS_RETRY_MAX_DELAY = 3600
+# Через сколько секунд «выполняемая» задача считается брошенной
+TASKS_LOCK_TIMEOUT = 600
+# Сколько секунд хранить выполненные задачи
+TASKS_RETENTION = 7 * 24 * 3600
+
+# Поиск по постам (blog.search): 'fts5' — виртуальная таблица SQLite,
+# 'terms' — обратный индекс в таблице SearchTerm, 'auto' — FTS5 на SQLite
+BLOG_SEARCH_BACKEND = 'auto'
+
+# Списки админки по таблицам больше этого числа строк показывают
+# оценку количества из статистики базы вместо COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100_000
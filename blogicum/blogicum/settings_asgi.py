@@ -0,0 +1,12 @@
+"""
+Настройки боевого сервера под ASGI (uvicorn, daphne, hypercorn):
+
+    export DJANGO_SETTINGS_MODULE=blogicum.settings_asgi
+    uvicorn blogicum.asgi:application --workers 4
+
+Синхронный код всех запросов процесса Django 3.2 выполняет в одном
+потоке, поэтому параллельность дают процессы (--workers).
+"""
+from .settings_production import *  # noqa: F401,F403
+
+BLOG_ASYNC_VIEWS = True
@@ -0,0 +1,70 @@
+"""
+Настройки боевого сервера на SQLite.
+
+Подключаются переменной окружения
+DJANGO_SETTINGS_MODULE=blogicum.settings_production.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import (
+    CACHES, DATABASES, MIDDLEWARE, PAGE_CACHE_BACKENDS, SECRET_KEY,
+    SESSION_CACHE_BACKENDS, _cache_backend,
+)
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.getenv('BLOGICUM_ALLOWED_HOSTS', 'localhost').split(',')
+
+SECRET_KEY = os.getenv('BLOGICUM_SECRET_KEY', SECRET_KEY)
+
+# Соединение живёт между запросами: файл базы не открывается заново
+# и PRAGMA не повторяются. Словари копируются, чтобы не менять
+# настройки разработки при импорте этого модуля.
+DATABASES = {
+    alias: {
+        **database,
+        'CONN_MAX_AGE': 600,
+        # Сколько секунд ждать блокировку записи вместо
+        # немедленной ошибки «database is locked»
+        'OPTIONS': {**database.get('OPTIONS', {}), 'timeout': 5},
+    }
+    for alias, database in DATABASES.items()
+}
+
+SQLITE_PRAGMAS = {
+    # Читатели не блокируют писателя и наоборот; режим хранится
+    # в самом файле базы
+    'journal_mode': 'WAL',
+    # В режиме WAL fsync только при контрольных точках: данные не
+    # портятся при сбое, последние транзакции могут потеряться лишь
+    # при отказе питания
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    # Кэш страниц на соединение, в КиБ (отрицательное значение)
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+METRICS_SERVER_TIMING = False
+
+# Сервер запускается несколькими процессами (gunicorn, uvicorn
+# --workers): страницы, сессии и пользователи лежат в общем кэше,
+# иначе сброс страницы, выход или смена пароля доходят только до
+# процесса, который обработал запрос. По умолчанию — файловый кэш
+# (все процессы на одной машине), для нескольких машин — redis.
+CACHES = {
+    **CACHES,
+    'pages': _cache_backend(
+        PAGE_CACHE_BACKENDS, 'BLOGICUM_PAGE_CACHE', default='file'
+    ),
+    'sessions': _cache_backend(
+        SESSION_CACHE_BACKENDS, 'BLOGICUM_SESSION_CACHE', default='file'
+    ),
+}
+
+# Статика с хэшами в именах и сжатыми копиями (команда build_static)
+# отдаётся первым middleware с кэшированием на год
+STATICFILES_STORAGE = 'blogicum.storage.CompressedManifestStaticFilesStorage'
+MIDDLEWARE = ['blogicum.middleware.StaticFilesMiddleware', *MIDDLEWARE]
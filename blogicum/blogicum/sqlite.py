@@ -0,0 +1,18 @@
+"""
+Настройка соединений SQLite.
+
+При каждом новом соединении выполняются PRAGMA из SQLITE_PRAGMAS
+в порядке объявления. Запросы идут мимо курсора Django, поэтому
+не попадают в метрики и счётчики запросов.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,110 @@
+"""
+Статика с хэшами в именах и заранее сжатыми копиями.
+
+CompressedManifestStaticFilesStorage после collectstatic кладёт рядом
+с текстовыми файлами копии .gz и, если установлен пакет brotli, .br.
+index_static_files описывает собранный STATIC_ROOT для
+blogicum.middleware.StaticFilesMiddleware.
+"""
+import gzip
+import mimetypes
+import os
+from collections import namedtuple
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # Без brotli отдаются только gzip-копии
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.txt', '.json', '.xml', '.html', '.ico',
+)
+# Сжатая копия сохраняется, только если она заметно меньше оригинала
+MIN_COMPRESSION_RATIO = 0.95
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+
+def _compressors():
+    compressors = {'gzip': lambda data: gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        compressors['br'] = brotli.compress
+    return compressors
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который заодно сжимает файлы"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        for encoding, compress in _compressors().items():
+            compressed = compress(data)
+            target = path + ENCODINGS[encoding]
+            if len(compressed) < len(data) * MIN_COMPRESSION_RATIO:
+                with open(target, 'wb') as file:
+                    file.write(compressed)
+            elif os.path.exists(target):
+                os.remove(target)
+
+
+StaticFile = namedtuple(
+    'StaticFile',
+    'path content_type size etag last_modified immutable encodings',
+)
+
+
+def static_url_prefix():
+    """Путь, под которым отдаётся статика, или None для внешнего домена"""
+    url = urlparse(settings.STATIC_URL)
+    if url.netloc:
+        return None
+    return '/' + url.path.strip('/') + '/'
+
+
+def index_static_files(root, prefix, hashed_names=()):
+    """
+    Описывает файлы собранной статики.
+
+    Returns:
+        dict: Путь запроса -> StaticFile. Файлы из hashed_names (имена
+            с хэшем из манифеста) помечены immutable, у каждого файла
+            перечислены сжатые копии.
+    """
+    hashed_names = set(hashed_names)
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(tuple(ENCODINGS.values())):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            stat = os.stat(path)
+            content_type, _ = mimetypes.guess_type(filename)
+            files[prefix + name] = StaticFile(
+                path=path,
+                content_type=content_type or 'application/octet-stream',
+                size=stat.st_size,
+                etag=f'"{stat.st_size:x}-{int(stat.st_mtime):x}"',
+                last_modified=int(stat.st_mtime),
+                immutable=name in hashed_names,
+                encodings={
+                    encoding: path + suffix
+                    for encoding, suffix in ENCODINGS.items()
+                    if os.path.exists(path + suffix)
+                },
+            )
+    return files
@@ -0,0 +1,91 @@
+// Автодополнение для <select data-autocomplete-url>: над списком
+// появляется поле поиска, варианты подгружаются по мере набора,
+// следующие страницы — кнопкой «Показать ещё».
+(function () {
+  function setup(select) {
+    var search = document.createElement('input');
+    search.type = 'search';
+    search.className = 'form-control mb-1';
+    search.placeholder = 'Начните вводить название';
+    search.setAttribute('aria-label', 'Поиск: ' + (select.labels[0] ? select.labels[0].textContent : ''));
+    select.parentNode.insertBefore(search, select);
+
+    var more = document.createElement('button');
+    more.type = 'button';
+    more.className = 'btn btn-link btn-sm px-0';
+    more.textContent = 'Показать ещё';
+    more.hidden = true;
+    var error = document.createElement('div');
+    error.className = 'form-text text-danger';
+    error.hidden = true;
+    select.parentNode.insertBefore(error, select.nextSibling);
+    select.parentNode.insertBefore(more, select.nextSibling);
+
+    var timer = null;
+    var request = 0;
+    var query = '';
+    var page = 1;
+
+    // Просроченная сессия отдаёт вместо JSON страницу входа
+    // (редирект, за которым fetch следует сам), поэтому проверяется
+    // и статус, и тип ответа.
+    function load(nextPage, append) {
+      var current = ++request;
+      var url = select.dataset.autocompleteUrl + '?q=' + encodeURIComponent(query) + '&page=' + nextPage;
+      more.disabled = true;
+      fetch(url, {credentials: 'same-origin', headers: {'Accept': 'application/json'}})
+        .then(function (response) {
+          var type = response.headers.get('Content-Type') || '';
+          if (!response.ok || type.indexOf('application/json') === -1) {
+            throw new Error(response.status);
+          }
+          return response.json();
+        })
+        .then(function (data) {
+          if (current !== request) {
+            return;
+          }
+          if (!append) {
+            var keep = Array.prototype.filter.call(select.options, function (option) {
+              return option.value === '' || option.selected;
+            });
+            select.innerHTML = '';
+            keep.forEach(function (option) { select.appendChild(option); });
+          }
+          data.results.forEach(function (item) {
+            if (Array.prototype.some.call(select.options, function (option) { return option.value === String(item.id); })) {
+              return;
+            }
+            select.appendChild(new Option(item.text, item.id));
+          });
+          page = nextPage;
+          more.hidden = !data.more;
+          more.disabled = false;
+          error.hidden = true;
+        })
+        .catch(function () {
+          if (current !== request) {
+            return;
+          }
+          more.disabled = false;
+          error.textContent = 'Не удалось загрузить варианты. Обновите страницу и попробуйте ещё раз.';
+          error.hidden = false;
+        });
+    }
+
+    search.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        query = search.value.trim();
+        load(1, false);
+      }, 250);
+    });
+    more.addEventListener('click', function () {
+      load(page + 1, true);
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(setup);
+  });
+})();
@@ -0,0 +1,21 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'name', 'status', 'attempts', 'run_at', 'locked_by', 'finished_at'
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('locked_by', 'locked_at', 'last_error', 'finished_at')
+    actions = ('requeue',)
+
+    @admin.action(description='Поставить в очередь заново')
+    def requeue(self, request, queryset):
+        queryset.update(status=Job.QUEUED, attempts=0, locked_by='',
+                        locked_at=None, run_at=timezone.now())
+
+
+admin.site.register(Job, JobAdmin)
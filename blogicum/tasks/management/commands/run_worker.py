@@ -0,0 +1,136 @@
+import multiprocessing
+import signal
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor,
+    ThreadPoolExecutor, wait,
+)
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from tasks.queue import (
+    claim, prune, release_stale, run_claimed, worker_id,
+)
+
+
+def _refresh_connections():
+    # Внутри открытой транзакции (например, в тестах) соединение
+    # закрывать нельзя
+    if not connection.in_atomic_block:
+        close_old_connections()
+
+
+def _execute(pk):
+    """Выполняет задачу в потоке или процессе пула"""
+    _refresh_connections()
+    try:
+        return run_claimed(pk)
+    finally:
+        _refresh_connections()
+
+
+class InlineExecutor(Executor):
+    """Выполняет задачи сразу в текущем потоке (--concurrency 1)"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as error:
+            future.set_exception(error)
+        return future
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из таблицы tasks.Job: опрашивает '
+        'очередь и запускает задачи в пуле потоков или процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Сколько задач выполнять одновременно.',
+        )
+        parser.add_argument(
+            '--executor', choices=('thread', 'process'), default='thread',
+            help='Пул потоков (для задач с вводом-выводом) или процессов '
+                 '(для задач, нагружающих процессор, например обработки '
+                 'изображений).',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        previous = {
+            signum: signal.signal(signum, self.stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        concurrency = max(options['concurrency'], 1)
+        if options['executor'] == 'process':
+            # Новые интерпретаторы вместо fork: дочерние процессы
+            # не наследуют открытые соединения с базой
+            executor = ProcessPoolExecutor(
+                concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        elif concurrency > 1:
+            executor = ThreadPoolExecutor(concurrency)
+        else:
+            executor = InlineExecutor()
+        try:
+            with executor:
+                done = self.work(executor, concurrency, options)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
+
+    def work(self, executor, concurrency, options):
+        worker = worker_id()
+        running = {}
+        done = 0
+        polls = 0
+        while not self.stopping:
+            if polls % 600 == 0:
+                release_stale()
+                prune()
+            polls += 1
+
+            free = concurrency - len(running)
+            for pk in claim(free, worker) if free else ():
+                running[executor.submit(_execute, pk)] = pk
+            _refresh_connections()
+
+            if not running:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+            finished, _ = wait(
+                running, timeout=options['poll_interval'],
+                return_when=FIRST_COMPLETED,
+            )
+            for future in finished:
+                pk = running.pop(future)
+                done += 1
+                self.stdout.write(f'Задача {pk}: {future.result()}')
+        # Дожидаемся начатых задач, чтобы они не остались «выполняемыми»
+        for future in wait(running).done:
+            done += 1
+            self.stdout.write(f'Задача {running[future]}: {future.result()}')
+        return done
+
+    def stop(self, signum, frame):
+        self.stdout.write('Завершаем начатые задачи...')
+        self.stopping = True
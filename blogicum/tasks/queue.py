@@ -0,0 +1,195 @@
+"""Очередь фоновых задач в таблице Job."""
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+def enqueue(name, *args, run_at=None, max_attempts=None, **kwargs):
+    """
+    Ставит вызов name(*args, **kwargs) в очередь.
+
+    Задача создаётся в текущей транзакции: если она откатится,
+    задачи не будет. Аргументы должны сериализоваться в JSON.
+
+    Args:
+        name (str): Путь для импорта функции.
+        run_at (datetime, optional): Не запускать раньше этого момента.
+        max_attempts (int, optional): Сколько раз пробовать выполнить;
+            по умолчанию TASKS_MAX_ATTEMPTS.
+    """
+    job = Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.TASKS_MAX_ATTEMPTS,
+    )
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: run_claimed(job.pk))
+    return job
+
+
+def worker_id():
+    """Имя обработчика: хост, процесс и поток"""
+    return (
+        f'{socket.gethostname()}:{os.getpid()}:'
+        f'{threading.get_ident()}'
+    )[:100]
+
+
+def release_stale(timeout=None):
+    """
+    Возвращает в очередь задачи, которые слишком долго числятся
+    выполняемыми: их обработчик, скорее всего, завершился аварийно.
+    """
+    timeout = timeout or settings.TASKS_LOCK_TIMEOUT
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(status=Job.QUEUED, locked_by='', locked_at=None)
+
+
+def claim(limit, worker=None):
+    """
+    Забирает до limit готовых к запуску задач и помечает их как
+    выполняемые этим обработчиком.
+
+    На PostgreSQL и MySQL строки блокируются SELECT ... FOR UPDATE
+    SKIP LOCKED, и параллельные обработчики не ждут друг друга. На
+    SQLite блокировок строк нет: задача захватывается условным
+    UPDATE ... WHERE status = 'queued', и из двух обработчиков его
+    выполнит только один.
+
+    Returns:
+        list: Ключи захваченных задач.
+    """
+    worker = worker or worker_id()
+    now = timezone.now()
+    ready = Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+    lock = {'status': Job.RUNNING, 'locked_by': worker, 'locked_at': now}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pks = list(
+                ready.select_for_update(skip_locked=True)
+                .values_list('pk', flat=True)[:limit]
+            )
+            Job.objects.filter(pk__in=pks).update(**lock)
+        return pks
+
+    claimed = []
+    for pk in ready.values_list('pk', flat=True)[:limit]:
+        if Job.objects.filter(pk=pk, status=Job.QUEUED).update(**lock):
+            claimed.append(pk)
+    return claimed
+
+
+def backoff(attempts):
+    """Задержка перед повтором: экспонента от числа попыток с разбросом"""
+    delay = min(
+        settings.TASKS_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        settings.TASKS_RETRY_MAX_DELAY,
+    )
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def _finish(job, error=None):
+    """Записывает итог попытки: успех, повтор с задержкой или отказ"""
+    if error is None:
+        job.status = Job.DONE
+        job.finished_at = timezone.now()
+    else:
+        job.last_error = error
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + backoff(job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+    job.locked_by, job.locked_at = '', None
+    job.save(update_fields=(
+        'attempts', 'status', 'run_at', 'last_error', 'locked_by',
+        'locked_at', 'finished_at',
+    ))
+    return job.status
+
+
+def run_job(pk):
+    """
+    Выполняет захваченную задачу pk и записывает результат.
+
+    При ошибке задача возвращается в очередь с задержкой backoff(),
+    пока не исчерпаны попытки, затем получает состояние failed.
+
+    Returns:
+        str: Итоговое состояние задачи.
+    """
+    job = Job.objects.filter(pk=pk).first()
+    if job is None:
+        return None
+    job.attempts += 1
+    try:
+        import_string(job.name)(*job.args, **job.kwargs)
+    except Exception:
+        return _finish(job, traceback.format_exc())
+    return _finish(job)
+
+
+def run_claimed(pk):
+    """
+    Выполняет захваченную задачу так, чтобы ошибка базы не остановила
+    обработчик.
+
+    Если run_job не смог прочитать задачу или записать результат,
+    попытка записывается как неудачная. Если недоступна и запись
+    неудачи, задача остаётся выполняемой, и её вернёт в очередь
+    release_stale().
+
+    Returns:
+        str: Итоговое состояние задачи.
+    """
+    try:
+        return run_job(pk)
+    except DatabaseError:
+        error = traceback.format_exc()
+    try:
+        job = Job.objects.filter(pk=pk, status=Job.RUNNING).first()
+        if job is None:
+            return None
+        job.attempts += 1
+        return _finish(job, error)
+    except DatabaseError:
+        return Job.RUNNING
+
+
+def run_pending(limit=100):
+    """
+    Захватывает и выполняет готовые задачи в текущем потоке.
+
+    Returns:
+        int: Сколько задач было выполнено.
+    """
+    pks = claim(limit)
+    for pk in pks:
+        run_claimed(pk)
+    return len(pks)
+
+
+def prune(retention=None):
+    """Удаляет выполненные задачи старше retention секунд"""
+    retention = retention or settings.TASKS_RETENTION
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE,
+        finished_at__lt=timezone.now() - timedelta(seconds=retention),
+    ).delete()
+    return deleted
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+from blog.paginators import EstimatedCountPaginator, estimate_rows
+
+pytestmark = [pytest.mark.django_db]
+
+CHANGELIST = '/admin/blog/post/'
+
+
+def _changelist_queries(admin_client, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.get(CHANGELIST, params)
+    assert response.status_code == 200
+    return response, len(queries)
+
+
+def test_changelist_queries_do_not_grow_with_rows(
+        admin_client, mixer, user, published_category, published_location):
+    def add_posts(number):
+        mixer.cycle(number).blend(
+            'blog.Post', author=user, category=published_category,
+            location=published_location, image=None,
+        )
+
+    add_posts(2)
+    # Первый запрос кладёт пользователя в кэш
+    _changelist_queries(admin_client)
+    _, few = _changelist_queries(admin_client)
+    add_posts(20)
+    _, many = _changelist_queries(admin_client)
+    assert many == few, (
+        'Убедитесь, что список постов в админке не делает отдельный'
+        ' запрос на автора, категорию и место каждой строки.'
+    )
+
+
+def test_changelist_search_uses_index(admin_client, mixer, user):
+    found = mixer.blend('blog.Post', author=user, title='Северное сияние',
+                        image=None)
+    mixer.blend('blog.Post', author=user, title='Южный ветер', image=None,
+                is_published=False)
+    response, _ = _changelist_queries(admin_client, q='сиян')
+    assert list(response.context['cl'].result_list) == [found]
+
+
+def test_post_form_uses_autocomplete(admin_client, mixer):
+    mixer.cycle(5).blend('blog.Location')
+    content = admin_client.get('/admin/blog/post/add/').content.decode()
+    assert 'admin-autocomplete' in content
+    assert content.count('<option') < 10, (
+        'Убедитесь, что поля автора, категории и места в админке'
+        ' не выводят все строки таблиц в <select>.'
+    )
+
+
+def test_estimated_count(settings, mixer, user):
+    mixer.cycle(12).blend('blog.Post', author=user, image=None)
+    Post.objects.filter(pk=Post.objects.first().pk).update(
+        is_published=False
+    )
+    with connection.cursor() as cursor:
+        # Частичный индекс: в sqlite_stat1 у него своя строка с одной
+        # записью
+        cursor.execute(
+            'CREATE INDEX post_hidden_idx ON blog_post (id) '
+            'WHERE is_published = 0'
+        )
+        cursor.execute('ANALYZE')
+    assert estimate_rows(Post) == 12, (
+        'Убедитесь, что оценка берётся не из статистики частичного индекса.'
+    )
+
+    settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 5
+    Post.objects.filter(
+        pk__in=list(Post.objects.values_list('pk', flat=True)[:2])
+    ).delete()
+    assert EstimatedCountPaginator(Post.objects.all(), 10).count == 12, (
+        'Для нефильтрованного списка большой таблицы используется оценка.'
+    )
+    assert EstimatedCountPaginator(
+        Post.objects.filter(is_published=True), 10
+    ).count == Post.objects.filter(is_published=True).count()
+
+    settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 100
+    assert EstimatedCountPaginator(Post.objects.all(), 10).count == 10
@@ -0,0 +1,78 @@
+import asyncio
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import resolve
+
+from blog.benchmarks import use_async_views
+
+
+@pytest.fixture
+def async_feeds():
+    with use_async_views(True):
+        yield
+
+
+def test_async_views_are_routed(async_feeds):
+    for path in ('/', '/posts/1/', '/category/slug/', '/profile/name/'):
+        assert asyncio.iscoroutinefunction(resolve(path).func), (
+            f'Убедитесь, что при BLOG_ASYNC_VIEWS адрес {path} обслуживает'
+            ' асинхронное представление.'
+        )
+    assert not asyncio.iscoroutinefunction(resolve('/posts/create/').func)
+
+
+@pytest.mark.django_db
+def test_async_views_render_under_asgi(
+        async_feeds, settings, post_with_published_location
+):
+    settings.METRICS_SERVER_TIMING = True
+    post = post_with_published_location
+    client = AsyncClient()
+
+    async def get(path):
+        return await client.get(path)
+
+    for path in (
+        '/', f'/posts/{post.id}/', f'/category/{post.category.slug}/',
+        f'/profile/{post.author.username}/',
+    ):
+        response = async_to_sync(get)(path)
+        assert response.status_code == 200, (
+            f'Убедитесь, что асинхронное представление {path} отвечает 200.'
+        )
+    assert post.title in response.content.decode('utf-8')
+    queries = re.search(r'desc="(\d+) queries"', response['Server-Timing'])
+    assert int(queries.group(1)) > 0, (
+        'Убедитесь, что под ASGI метрики учитывают запросы к базе.'
+    )
+
+
+@pytest.mark.django_db
+def test_concurrent_async_requests_count_own_queries(
+        async_feeds, settings, post_with_published_location
+):
+    settings.METRICS_SERVER_TIMING = True
+    path = f'/posts/{post_with_published_location.id}/'
+    client = AsyncClient()
+
+    async def get_many(count):
+        return await asyncio.gather(
+            *(client.get(path) for _ in range(count))
+        )
+
+    def queries(response):
+        assert response.status_code == 200
+        return int(
+            re.search(r'desc="(\d+) queries"', response['Server-Timing'])
+            .group(1)
+        )
+
+    expected = queries(async_to_sync(get_many)(1)[0])
+    responses = async_to_sync(get_many)(8)
+    assert [queries(response) for response in responses] == [expected] * 8, (
+        'Убедитесь, что под ASGI каждый из одновременных запросов'
+        ' учитывает только свои запросы к базе.'
+    )
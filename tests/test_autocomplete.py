@@ -0,0 +1,76 @@
+import pytest
+from django.utils import timezone
+
+from blog.forms import PostForm
+from blog.views import AUTOCOMPLETE_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def many_locations(mixer):
+    return mixer.cycle(AUTOCOMPLETE_PER_PAGE + 5).blend(
+        'blog.Location', is_published=True,
+        name=mixer.sequence('Москва {0:02d}'),
+    )
+
+
+def test_create_page_renders_only_selected_options(
+        user_client, many_locations
+):
+    content = user_client.get('/posts/create/').content.decode('utf-8')
+    assert content.count('<option') <= 2, (
+        'Убедитесь, что форма поста не выводит все местоположения'
+        ' в выпадающем списке.'
+    )
+    assert 'data-autocomplete-url="/autocomplete/locations/"' in content
+    assert 'js/autocomplete.js' in content
+
+
+def test_location_autocomplete(user_client, mixer, many_locations):
+    hidden = mixer.blend(
+        'blog.Location', name='Москва скрытая', is_published=False
+    )
+    mixer.blend('blog.Location', name='Казань', is_published=True)
+
+    data = user_client.get(
+        '/autocomplete/locations/', {'q': 'моск'}
+    ).json()
+    assert len(data['results']) == AUTOCOMPLETE_PER_PAGE
+    assert data['more'], (
+        'Убедитесь, что ответ сообщает о следующей странице вариантов.'
+    )
+    assert data['results'][0] == {
+        'id': many_locations[0].id, 'text': 'Москва 00'
+    }
+
+    data = user_client.get(
+        '/autocomplete/locations/', {'q': 'Моск', 'page': 2}
+    ).json()
+    assert len(data['results']) == 5
+    assert not data['more']
+    assert hidden.id not in {item['id'] for item in data['results']}, (
+        'Убедитесь, что неопубликованные местоположения не предлагаются.'
+    )
+
+
+def test_autocomplete_requires_login(client):
+    response = client.get('/autocomplete/categories/')
+    assert response.status_code == 302
+
+
+def test_form_rejects_unpublished_location(
+        mixer, published_category, published_location
+):
+    hidden = mixer.blend('blog.Location', is_published=False)
+    data = {
+        'title': 'Заголовок',
+        'text': 'Текст',
+        'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+        'category': published_category.id,
+    }
+    assert PostForm(data={**data, 'location': published_location.id}).is_valid()
+    form = PostForm(data={**data, 'location': hidden.id})
+    assert not form.is_valid() and 'location' in form.errors, (
+        'Убедитесь, что форма не принимает неопубликованное местоположение.'
+    )
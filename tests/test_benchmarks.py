@@ -0,0 +1,41 @@
+import pytest
+
+from blog.benchmarks import (
+    compare_results, measure, percentile, run_flows, seed_feed, view_flows,
+)
+
+
+def test_percentile():
+    timings = list(range(1, 101))
+    assert percentile(timings, 50) == 50
+    assert percentile(timings, 99) == 99
+    assert percentile([7], 99) == 7
+
+
+def test_compare_results_flags_slowdowns():
+    baseline = {'index': measure(lambda: None, repeat=3, warmup=0)}
+    slower = {
+        'index': {**baseline['index'], 'p99_ms': baseline['index']['p99_ms']
+                  * 2 + 1},
+        'new_flow': baseline['index'],
+    }
+    assert compare_results(baseline, baseline, 0.2) == []
+    assert [row[:2] for row in compare_results(baseline, slower, 0.2)] == [
+        ('index', 'p99_ms')
+    ]
+
+
+@pytest.mark.django_db
+def test_view_flows_smoke():
+    seed_feed(
+        'default', posts=30, comments=60, users=3, categories=2,
+        locations=2,
+    )
+    results = run_flows(view_flows('testserver'), repeat=2, warmup=0)
+    assert set(results) == {
+        'index', 'index_page_50', 'category', 'profile', 'detail',
+        'comments', 'comment_create', 'post_create',
+    }
+    for result in results.values():
+        assert result['runs'] == 2
+        assert result['p50_ms'] <= result['p99_ms']
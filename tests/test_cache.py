@@ -0,0 +1,170 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.caching import _timeout_until_next_publication
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize(
+    'edit',
+    ['post', 'category', 'location', 'comment_count'],
+)
+def test_post_card_cache_follows_edits(
+        user_client, post_with_published_location, edit):
+    post = post_with_published_location
+    user_client.get('/')
+
+    if edit == 'post':
+        post.title = expected = 'Новый заголовок поста'
+        post.save()
+    elif edit == 'category':
+        post.category.title = expected = 'Новое название категории'
+        post.category.save()
+    elif edit == 'location':
+        post.location.name = expected = 'Новое название места'
+        post.location.save()
+    else:
+        post.comments.create(author=post.author, text='Комментарий')
+        type(post).objects.update_comment_count(post.pk, 1)
+        expected = 'Комментарии (1)'
+
+    content = user_client.get('/').content.decode('utf-8')
+    assert expected in content, (
+        'Убедитесь, что закэшированная карточка поста обновляется после'
+        ' правки поста, его категории, местоположения или комментариев.'
+    )
+
+
+def test_anonymous_feed_page_is_cached_and_purged(
+        client, django_assert_num_queries, post_with_published_location,
+        mixer):
+    post = post_with_published_location
+    urls = (
+        '/',
+        f'/category/{post.category.slug}/',
+        f'/profile/{post.author.username}/',
+    )
+    for url in urls:
+        client.get(url)
+    with django_assert_num_queries(0):
+        for url in urls:
+            client.get(url)
+
+    post.title = 'Заголовок после правки'
+    post.save()
+    for url in urls:
+        assert post.title in client.get(url).content.decode('utf-8'), (
+            'Убедитесь, что закэшированные страницы лент сбрасываются'
+            ' после правки поста.'
+        )
+
+
+def test_cached_page_expires_at_scheduled_publication(
+        client, post_with_published_location):
+    post = post_with_published_location
+    post.pk = None
+    post.pub_date = timezone.now() + timedelta(seconds=30)
+    post.save()
+    assert _timeout_until_next_publication('index', None) <= 31
+    assert _timeout_until_next_publication(
+        'author', post.author.username
+    ) <= 31
+
+
+def test_authorised_pages_bypass_page_cache(
+        user_client, django_assert_max_num_queries,
+        post_with_published_location):
+    user_client.get('/')
+    with django_assert_max_num_queries(5) as queries:
+        user_client.get('/')
+    assert len(queries) > 0
+
+
+@pytest.mark.parametrize('logged_in', [False, True])
+def test_conditional_get_answers_not_modified(
+        client, user_client, post_with_published_location, logged_in):
+    client = user_client if logged_in else client
+    post = post_with_published_location
+    for url in ('/', f'/posts/{post.id}/'):
+        response = client.get(url)
+        etag = response['ETag']
+        assert response.has_header('Last-Modified')
+
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert not_modified.status_code == 304, (
+            'Убедитесь, что на повторный запрос с тем же ETag'
+            ' отдаётся ответ 304 без тела.'
+        )
+
+        metrics = client.get('/metrics/').content.decode('utf-8')
+        assert 'blogicum_conditional_responses_total{result="not_modified"' \
+            in metrics
+
+        post.comments.create(author=post.author, text='Новый комментарий')
+        type(post).objects.update_comment_count(post.pk, 1)
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_etag_differs_between_users(
+        client, user_client, another_user_client,
+        post_with_published_location):
+    url = f'/posts/{post_with_published_location.id}/'
+    etags = {c.get(url)['ETag'] for c in (
+        client, user_client, another_user_client
+    )}
+    assert len(etags) == 3
+
+
+def test_feed_pages_survive_signup_but_not_rename(
+        client, django_assert_num_queries, django_user_model,
+        post_with_published_location):
+    client.get('/')
+    django_user_model.objects.create_user('newcomer', password='secret')
+    with django_assert_num_queries(0):
+        client.get('/')
+
+    author = post_with_published_location.author
+    author.username = 'renamed_author'
+    author.save()
+    assert '@renamed_author' in client.get('/').content.decode('utf-8'), (
+        'Убедитесь, что смена ника автора сбрасывает закэшированные'
+        ' ленты, а регистрация нового пользователя — нет.'
+    )
+
+
+def test_post_delete_does_not_query_per_comment(
+        mixer, user, post_with_published_location):
+    def delete_queries(comments):
+        post = mixer.blend(
+            'blog.Post', author=user, category=None, location=None,
+            image=None,
+        )
+        mixer.cycle(comments).blend('blog.Comment', post=post, author=user)
+        with CaptureQueriesContext(connection) as queries:
+            post.delete()
+        return len(queries)
+
+    assert delete_queries(2) == delete_queries(12), (
+        'Убедитесь, что удаление поста не делает запрос на каждый'
+        ' его комментарий.'
+    )
+
+
+def test_etag_changes_with_csrf_token(
+        user_client, post_with_published_location):
+    url = f'/posts/{post_with_published_location.id}/'
+    etag = user_client.get(url)['ETag']
+    assert user_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    # Вход в систему выдаёт новый CSRF-токен
+    user_client.cookies['csrftoken'] = 'a' * 64
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        'Убедитесь, что после смены CSRF-токена страница с формой'
+        ' отдаётся заново, а не как 304.'
+    )
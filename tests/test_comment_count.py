@@ -0,0 +1,131 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+ADMIN_COMMENTS = '/admin/blog/comment/'
+
+
+def _count(post):
+    return Post.objects.values_list('comment_count', flat=True).get(pk=post.pk)
+
+
+@pytest.fixture
+def two_posts(mixer, user, published_category):
+    return mixer.cycle(2).blend(
+        'blog.Post', author=user, category=published_category,
+        location=None, image=None,
+    )
+
+
+def test_update_comment_count(post_with_published_location):
+    post = post_with_published_location
+    updated_at = post.updated_at
+    Post.objects.update_comment_count(post.pk, 2)
+    Post.objects.update_comment_count(post.pk, -1)
+    post.refresh_from_db()
+    assert post.comment_count == 1
+    assert post.updated_at > updated_at, (
+        'Убедитесь, что изменение счётчика комментариев сдвигает'
+        ' updated_at поста.'
+    )
+
+
+def test_admin_keeps_comment_count(admin_client, admin_user, two_posts):
+    first, second = two_posts
+    response = admin_client.post(f'{ADMIN_COMMENTS}add/', {
+        'text': 'Комментарий', 'post': first.pk, 'author': admin_user.pk,
+    })
+    assert response.status_code == 302
+    comment = Comment.objects.get()
+    assert (_count(first), _count(second)) == (1, 0), (
+        'Убедитесь, что комментарий, добавленный в админке, учитывается'
+        ' в счётчике поста.'
+    )
+
+    admin_client.post(f'{ADMIN_COMMENTS}{comment.pk}/change/', {
+        'text': 'Комментарий', 'post': second.pk, 'author': admin_user.pk,
+    })
+    assert (_count(first), _count(second)) == (0, 1), (
+        'Убедитесь, что перенос комментария на другой пост в админке'
+        ' переносит и счётчик.'
+    )
+
+    detail = f'/posts/{second.pk}/'
+    etag = admin_client.get(detail)['ETag']
+    admin_client.post(f'{ADMIN_COMMENTS}{comment.pk}/change/', {
+        'text': 'Исправленный комментарий', 'post': second.pk,
+        'author': admin_user.pk,
+    })
+    response = admin_client.get(detail, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        'Убедитесь, что правка текста комментария в админке меняет'
+        ' ETag страницы поста.'
+    )
+    assert 'Исправленный комментарий' in response.content.decode('utf-8')
+
+    admin_client.post(f'{ADMIN_COMMENTS}{comment.pk}/delete/', {
+        'post': 'yes',
+    })
+    assert _count(second) == 0
+
+    for post in (first, first, first, second, second):
+        Comment.objects.create(post=post, author=admin_user, text='Текст')
+        Post.objects.update_comment_count(post.pk, 1)
+    admin_client.post(ADMIN_COMMENTS, {
+        'action': 'delete_selected',
+        '_selected_action': list(
+            Comment.objects.values_list('pk', flat=True)
+        ),
+        'post': 'yes',
+    })
+    assert not Comment.objects.exists()
+    assert (_count(first), _count(second)) == (0, 0), (
+        'Убедитесь, что массовое удаление комментариев в админке'
+        ' уменьшает счётчики постов.'
+    )
+
+
+def test_recount_comments_fixes_drift(two_posts, user):
+    first, second = two_posts
+    Comment.objects.create(post=first, author=user, text='Текст')
+    Post.objects.filter(pk=second.pk).update(comment_count=5)
+    call_command('recount_comments', '--batch-size', '1', stdout=StringIO())
+    assert (_count(first), _count(second)) == (1, 0), (
+        'Убедитесь, что команда recount_comments исправляет разошедшиеся'
+        ' счётчики комментариев.'
+    )
+
+
+def test_deleting_user_recounts_other_posts(
+        post_with_published_location, another_user):
+    post = post_with_published_location
+    for author in (another_user, another_user, post.author):
+        Comment.objects.create(post=post, author=author, text='Текст')
+    Post.objects.update_comment_count(post.pk, 3)
+    another_user.delete()
+    assert _count(post) == 1, (
+        'Убедитесь, что удаление пользователя вместе с его комментариями'
+        ' уменьшает счётчики комментариев чужих постов.'
+    )
+
+
+def test_stale_post_save_keeps_comment_count(post_with_published_location):
+    post = post_with_published_location
+    stale = Post.objects.get(pk=post.pk)
+    Post.objects.update_comment_count(post.pk, 1)
+    stale.title = 'Новый заголовок'
+    stale.save()
+    stale.refresh_from_db()
+    assert (stale.title, stale.comment_count) == ('Новый заголовок', 1), (
+        'Убедитесь, что сохранение ранее загруженного поста не затирает'
+        ' счётчик комментариев.'
+    )
+
+    stale.comment_count = 7
+    stale.save(update_fields=['comment_count'])
+    assert _count(post) == 7
@@ -0,0 +1,136 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from blog.dumps import iter_dump_objects, open_dump
+from blog.models import Post
+
+DB_JSON = Path(__file__).resolve().parent.parent / 'db.json'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1 << 16])
+def test_iter_dump_objects_reads_arrays_and_lines(chunk_size):
+    objects = [{'model': 'blog.location', 'pk': i, 'fields': {
+        'name': f'Место {i} [, ]'
+    }} for i in range(1, 6)]
+    array = json.dumps(objects, ensure_ascii=False, indent=2)
+    lines = '\n'.join(json.dumps(obj) for obj in objects) + '\n'
+    for text in (array, lines):
+        assert list(
+            iter_dump_objects(io.StringIO(text), chunk_size)
+        ) == objects
+
+
+def test_iter_dump_objects_grows_reads_only_for_large_objects():
+    small = [{'pk': i} for i in range(200)]
+    large = {'pk': 'large', 'text': 'x' * 1000}
+    text = json.dumps(small + [large] + small)
+
+    class Stream(io.StringIO):
+        sizes = []
+
+        def read(self, size=-1):
+            self.sizes.append(size)
+            return super().read(size)
+
+    stream = Stream(text)
+    assert list(iter_dump_objects(stream, 64)) == small + [large] + small
+    assert max(stream.sizes) < 2 * len(json.dumps(large)), (
+        'Убедитесь, что порция чтения растёт только под объект,'
+        ' не поместившийся в буфер.'
+    )
+    assert stream.sizes[-10:] == [64] * 10, (
+        'Убедитесь, что после большого объекта чтение возвращается'
+        ' к исходному размеру порции.'
+    )
+
+
+def test_iter_dump_objects_rejects_truncated_dump():
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_dump_objects(io.StringIO('[{"model": "blog.post"'), 4))
+
+
+@pytest.mark.django_db
+def test_bulk_loaddata_matches_loaddata():
+    fixture = json.loads(DB_JSON.read_text(encoding='utf-8'))
+    expected = sum(1 for obj in fixture if obj['model'] == 'blog.post')
+
+    call_command('bulk_loaddata', str(DB_JSON), batch_size=10,
+                 stdout=io.StringIO())
+
+    assert Post.objects.count() == expected
+    assert not Post.objects.filter(excerpt='').exists(), (
+        'Убедитесь, что после загрузки дампа у постов заполнены анонсы.'
+    )
+    # Повторная загрузка обновляет строки с теми же ключами
+    call_command('bulk_loaddata', str(DB_JSON), stdout=io.StringIO())
+    assert Post.objects.count() == expected
+    # Последовательность ключей сдвинута за загруженные строки
+    post = Post.objects.first()
+    post.pk = None
+    post.save()
+    assert post.pk > max(
+        obj['pk'] for obj in fixture if obj['model'] == 'blog.post'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ['blog.jsonl', 'blog.ndjson.gz'])
+def test_export_blog_round_trip(tmp_path, name, comment):
+    path = tmp_path / name
+    call_command('export_blog', str(path), chunk_size=1,
+                 stdout=io.StringIO())
+    assert not path.with_name(name + '.checkpoint').exists()
+
+    with open_dump(path) as stream:
+        exported = list(iter_dump_objects(stream))
+    models = [obj['model'] for obj in exported]
+    assert models.index('blog.post') < models.index('blog.comment')
+    assert {'blog.post', 'blog.comment', 'auth.user'} <= set(models)
+
+    Post.objects.all().delete()
+    call_command('bulk_loaddata', str(path), stdout=io.StringIO())
+    post = Post.objects.get()
+    assert post.comments.get().text == comment.text
+    assert post.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_export_blog_resumes_from_checkpoint(
+        tmp_path, monkeypatch, many_posts_with_published_locations):
+    from blog.management.commands import export_blog
+
+    path = tmp_path / 'blog.ndjson.gz'
+    original = export_blog.serialize_lines
+    calls = []
+
+    def crash_on_third_chunk(objects):
+        calls.append(objects)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return original(objects)
+
+    monkeypatch.setattr(export_blog, 'serialize_lines', crash_on_third_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        call_command('export_blog', str(path), chunk_size=2,
+                     stdout=io.StringIO())
+    monkeypatch.setattr(export_blog, 'serialize_lines', original)
+    # Недописанная порция прерванного запуска
+    with open(path, 'ab') as output:
+        output.write(b'\x1f\x8b half-written chunk')
+
+    with pytest.raises(CommandError):
+        call_command('export_blog', str(path), stdout=io.StringIO())
+    call_command('export_blog', str(path), chunk_size=2, resume=True,
+                 stdout=io.StringIO())
+
+    with open_dump(path) as stream:
+        keys = [(obj['model'], obj['pk']) for obj in iter_dump_objects(stream)]
+    assert len(keys) == len(set(keys)), (
+        'Убедитесь, что продолжение выгрузки не дублирует строки.'
+    )
+    assert sum(model == 'blog.post' for model, _ in keys) == \
+        Post.objects.count()
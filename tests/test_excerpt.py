@@ -0,0 +1,73 @@
+import importlib
+from io import StringIO
+from types import SimpleNamespace
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+
+from blog.models import EXCERPT_WORDS, Post
+
+pytestmark = [pytest.mark.django_db]
+
+LONG_TEXT = ' '.join(f'слово{number}' for number in range(30))
+EXPECTED_EXCERPT = (
+    ' '.join(f'слово{number}' for number in range(EXCERPT_WORDS)) + ' …'
+)
+
+
+def test_excerpt_is_filled_on_save(post_with_published_location):
+    post = post_with_published_location
+    post.text = LONG_TEXT
+    post.save()
+    post.refresh_from_db()
+    assert post.excerpt == EXPECTED_EXCERPT, (
+        'Убедитесь, что анонс поста заполняется при сохранении.'
+    )
+
+    deferred = Post.objects.defer('text').get(pk=post.pk)
+    deferred.title = 'Новый заголовок'
+    deferred.save()
+    post.refresh_from_db()
+    assert post.excerpt == EXPECTED_EXCERPT
+    assert post.text == LONG_TEXT
+
+
+def test_backfill_excerpts(post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(text=LONG_TEXT, excerpt='')
+    call_command('backfill_excerpts', stdout=StringIO())
+    post.refresh_from_db()
+    assert post.excerpt == EXPECTED_EXCERPT, (
+        'Убедитесь, что команда backfill_excerpts заполняет пустые анонсы.'
+    )
+
+    Post.objects.filter(pk=post.pk).update(text='Совсем другой текст')
+    call_command('backfill_excerpts', '--all', stdout=StringIO())
+    post.refresh_from_db()
+    assert post.excerpt == 'Совсем другой текст'
+
+
+def test_migration_fills_excerpts(post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(text=LONG_TEXT, excerpt='')
+    migration = importlib.import_module('blog.migrations.0006_post_excerpt')
+    migration.fill_excerpt(apps, SimpleNamespace(connection=connection))
+    post.refresh_from_db()
+    assert post.excerpt == EXPECTED_EXCERPT
+
+
+def test_feed_defers_full_text(client, post_with_published_location):
+    post = post_with_published_location
+    post.text = LONG_TEXT
+    post.save()
+    response = client.get('/')
+    [card] = response.context['page_obj']
+    assert 'text' in card.get_deferred_fields(), (
+        'Убедитесь, что лента не загружает полный текст постов.'
+    )
+    content = response.content.decode('utf-8')
+    assert 'слово9' in content and 'слово10' not in content, (
+        'Убедитесь, что карточка поста в ленте выводит анонс.'
+    )
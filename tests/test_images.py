@@ -0,0 +1,118 @@
+from io import BytesIO
+
+import pytest
+from bs4 import BeautifulSoup
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from blog.images import VARIANT_WIDTHS
+from blog.models import Post
+from tasks.queue import run_pending
+
+
+def _upload(width, height, name='wide.png'):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color=(73, 109, 137)).save(
+        buffer, format='PNG'
+    )
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@pytest.mark.django_db
+def test_variants_are_made_on_upload(
+        user_client, user, published_category, cleanup):
+    response = user_client.post('/posts/create/', {
+        'title': 'Большая фотография',
+        'text': 'Текст',
+        'pub_date': '2020-01-01T10:00',
+        'category': published_category.pk,
+        'is_published': 'on',
+        'image': _upload(2000, 1000),
+    })
+    assert response.status_code == 302
+    post = Post.objects.get(title='Большая фотография')
+    assert post.image_variants == {}, (
+        'Убедитесь, что копии изображения готовятся в фоновой задаче,'
+        ' а не в запросе.'
+    )
+    assert run_pending() == 1
+    post.refresh_from_db()
+    variants = post.image_variants
+    assert variants['source'] == post.image.name
+    for kind in ('webp', 'jpeg'):
+        assert [width for width, _ in variants[kind]] == \
+            list(VARIANT_WIDTHS), (
+            'Убедитесь, что для изображения поста готовятся копии'
+            ' всех ширин в WebP и JPEG.'
+        )
+        for width, name in variants[kind]:
+            with post.image.storage.open(name) as file:
+                assert Image.open(file).width == width
+
+    page = BeautifulSoup(
+        user_client.get(f'/posts/{post.pk}/').content.decode('utf-8'),
+        features='html.parser',
+    )
+    webp = page.find('source', type='image/webp')
+    assert webp and '320w' in webp['srcset'] and '1280w' in webp['srcset']
+    img = page.find('picture').find('img')
+    assert img['src'].endswith('_1280w.jpg')
+    assert (img['width'], img['height']) == ('1280', '640')
+
+    old_names = [name for _, name in variants['webp']]
+    post.image = _upload(200, 100, 'small.png')
+    post.save()
+    run_pending()
+    post.refresh_from_db()
+    assert [width for width, _ in post.image_variants['webp']] == [200], (
+        'Убедитесь, что маленькие изображения не увеличиваются.'
+    )
+    assert not any(post.image.storage.exists(name) for name in old_names)
+
+
+@pytest.mark.django_db
+def test_card_uses_original_until_variants_exist(
+        client, post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(image_variants={})
+    content = client.get('/').content.decode('utf-8')
+    assert f'src="{post.image.url}"' in content
+
+
+@pytest.mark.django_db
+def test_failed_regeneration_keeps_old_variants(
+        monkeypatch, user, published_category, cleanup):
+    post = Post.objects.create(
+        title='Фото', text='Текст', author=user,
+        category=published_category, pub_date='2020-01-01T10:00Z',
+        image=_upload(800, 400),
+    )
+    run_pending()
+    post.refresh_from_db()
+    old_variants = post.image_variants
+    storage = post.image.storage
+    files_before = set(storage.listdir('posts_images/variants')[1])
+
+    save = Image.Image.save
+
+    def full_disk(self, fp, format=None, **params):
+        if format == 'JPEG':
+            raise OSError('No space left on device')
+        return save(self, fp, format, **params)
+
+    monkeypatch.setattr(Image.Image, 'save', full_disk)
+    with pytest.raises(OSError):
+        post.update_image_variants(force=True)
+    post.refresh_from_db()
+    assert post.image_variants == old_variants, (
+        'Убедитесь, что при сбое подготовки копий в базе остаются'
+        ' прежние копии.'
+    )
+    for kind in ('webp', 'jpeg'):
+        for _, name in old_variants[kind]:
+            assert storage.exists(name), (
+                'Убедитесь, что прежние копии удаляются только после'
+                ' сохранения новых.'
+            )
+    assert set(storage.listdir('posts_images/variants')[1]) == \
+        files_before, 'Убедитесь, что недоделанные копии удаляются.'
@@ -0,0 +1,73 @@
+import re
+
+import pytest
+
+
+def _histogram_count(metrics, name, view):
+    match = re.search(
+        rf'^{name}_count{{view="{re.escape(view)}"}} (\d+)$',
+        metrics, re.MULTILINE
+    )
+    return int(match.group(1)) if match else 0
+
+
+@pytest.mark.django_db
+def test_views_are_measured(client, post_with_published_location):
+    post = post_with_published_location
+    metrics = client.get('/metrics/').content.decode('utf-8')
+    before = _histogram_count(
+        metrics, 'blogicum_request_db_queries', 'blog:post_detail'
+    )
+
+    client.get(f'/posts/{post.id}/')
+    client.get('/pages/about/')
+
+    metrics = client.get('/metrics/').content.decode('utf-8')
+    for name in (
+        'blogicum_request_duration_seconds',
+        'blogicum_request_db_queries',
+        'blogicum_request_db_duration_seconds',
+        'blogicum_request_template_duration_seconds',
+    ):
+        assert f'# TYPE {name} histogram' in metrics, (
+            f'Убедитесь, что на /metrics/ отдаётся гистограмма {name}.'
+        )
+    assert _histogram_count(
+        metrics, 'blogicum_request_db_queries', 'blog:post_detail'
+    ) == before + 1, (
+        'Убедитесь, что каждый запрос к странице поста учитывается'
+        ' в метриках под именем маршрута.'
+    )
+    assert _histogram_count(
+        metrics, 'blogicum_request_template_duration_seconds', 'pages:about'
+    ) >= 1
+    assert 'le="+Inf"' in metrics
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client, settings):
+    settings.METRICS_SERVER_TIMING = True
+    response = client.get('/pages/about/')
+    assert re.match(
+        r'db;dur=[\d.]+;desc="0 queries", tpl;dur=[\d.]+, total;dur=[\d.]+',
+        response['Server-Timing']
+    ), 'Убедитесь, что в заголовке Server-Timing есть время SQL и шаблонов.'
+
+    settings.METRICS_SERVER_TIMING = False
+    assert not client.get('/pages/about/').has_header('Server-Timing')
+
+
+@pytest.mark.django_db
+def test_metrics_are_closed_to_outside_visitors(
+        client, admin_client, user_client, settings):
+    assert client.get('/metrics/').status_code == 200
+    settings.METRICS_ALLOWED_NETWORKS = ['10.0.0.0/8']
+    assert client.get('/metrics/', REMOTE_ADDR='10.1.2.3').status_code == 200
+    for visitor in (client, user_client):
+        assert visitor.get('/metrics/').status_code == 404, (
+            'Убедитесь, что /metrics/ недоступен посетителям вне'
+            ' METRICS_ALLOWED_NETWORKS.'
+        )
+    assert admin_client.get('/metrics/').status_code == 200, (
+        'Убедитесь, что сотрудникам /metrics/ доступен с любого адреса.'
+    )
@@ -0,0 +1,170 @@
+import base64
+import json
+from datetime import timedelta
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from blog.models import Post
+from blog.paginators import CursorPaginator
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category):
+    # Половина постов с одинаковой датой — проверяем разрешение ничьих по id
+    now = timezone.now() - timedelta(days=1)
+    dates = (
+        now - timedelta(hours=i // 2) for i in range(N_PER_PAGE * 2 + 5)
+    )
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=dates,
+    )
+
+
+def _walk(paginator, direction):
+    page = paginator.get_page()
+    pages = [page]
+    while page.has_next():
+        page = paginator.get_page(page.next_cursor)
+        pages.append(page)
+    if direction == 'back':
+        pages = [page]
+        while page.has_previous():
+            page = paginator.get_page(page.previous_cursor)
+            pages.insert(0, page)
+    return pages
+
+
+def test_cursor_paginator_walks_feed_without_gaps(feed_posts):
+    queryset = Post.objects.all()
+    expected = list(queryset.order_by('-pub_date', '-pk'))
+    paginator = CursorPaginator(queryset, N_PER_PAGE)
+
+    forward = _walk(paginator, 'forward')
+    assert [p for page in forward for p in page] == expected, (
+        'Убедитесь, что курсорная пагинация проходит ленту вперёд без'
+        ' пропусков и повторов.'
+    )
+    backward = _walk(paginator, 'back')
+    assert [p for page in backward for p in page] == expected, (
+        'Убедитесь, что курсорная пагинация проходит ленту назад без'
+        ' пропусков и повторов.'
+    )
+    assert not forward[0].has_previous()
+    assert not forward[-1].has_next()
+
+
+def test_cursor_paginator_ignores_broken_cursor(feed_posts):
+    paginator = CursorPaginator(Post.objects.all(), N_PER_PAGE)
+    page = paginator.get_page('not-a-cursor')
+    assert list(page) == list(paginator.get_page())
+
+
+def _cursor(direction, values):
+    payload = json.dumps([direction, values]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+BAD_CURSOR_VALUES = [
+    ['2020-13-45T10:00:00', 1],
+    ['2020-01-01T10:00:00+00:00', 'abc'],
+    ['2020-01-01T10:00:00+00:00', {'pk': 1}],
+    ['2020-01-01T10:00:00+00:00', None],
+    [None, 1],
+    [12345, 1],
+]
+
+
+@pytest.mark.parametrize('values', BAD_CURSOR_VALUES)
+def test_cursor_paginator_rejects_bad_cursor_values(feed_posts, values):
+    paginator = CursorPaginator(Post.objects.all(), N_PER_PAGE)
+    page = paginator.get_page(_cursor('next', values))
+    assert list(page) == list(paginator.get_page()), (
+        'Убедитесь, что курсор с недопустимыми значениями полей'
+        ' сортировки открывает первую страницу.'
+    )
+
+
+@override_settings(BLOG_FEED_PAGINATION='cursor')
+@pytest.mark.parametrize('values', BAD_CURSOR_VALUES)
+def test_index_ignores_bad_cursor_values(client, feed_posts, values):
+    response = client.get('/', {'cursor': _cursor('next', values)})
+    assert response.status_code == 200, (
+        'Убедитесь, что лента с повреждённым курсором не падает'
+        ' с ошибкой 500.'
+    )
+
+
+@override_settings(BLOG_FEED_PAGINATION='cursor')
+def test_index_cursor_mode(client, feed_posts):
+    response = client.get('/')
+    page_obj = response.context['page_obj']
+    assert len(page_obj) == N_PER_PAGE
+    assert f'?cursor={page_obj.next_cursor}' in response.content.decode()
+
+    response = client.get('/', {'cursor': page_obj.next_cursor})
+    second = response.context['page_obj']
+    assert len(second) == N_PER_PAGE
+    assert not set(p.pk for p in page_obj) & set(p.pk for p in second)
+
+
+def test_feed_count_is_cached_and_invalidated(
+        another_user_client, feed_posts, django_assert_num_queries, mixer,
+        user, published_category):
+    client = another_user_client
+    client.get('/')
+    # Две отметки для ETag и сами посты — без COUNT; сессия и
+    # пользователь берутся из кэша
+    with django_assert_num_queries(3):
+        response = client.get('/')
+    assert response.context['page_obj'].paginator.count == len(feed_posts)
+
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+    response = client.get('/')
+    assert response.context['page_obj'].paginator.count == (
+        len(feed_posts) + 1
+    ), 'Убедитесь, что новый пост сбрасывает закэшированное количество.'
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=4)
+def test_post_comments_are_loaded_in_chunks(
+        client, mixer, post_with_published_location):
+    comments = mixer.cycle(10).blend(
+        'blog.Comment', post=post_with_published_location
+    )
+    url = f'/posts/{post_with_published_location.id}/'
+    page = client.get(url).context['comments']
+    loaded = list(page)
+    assert len(loaded) == 4 and page.has_next(), (
+        'Убедитесь, что на странице публикации сразу выводится только'
+        ' первая порция комментариев.'
+    )
+    while page.has_next():
+        response = client.get(
+            f'{url}comments/', {'cursor': page.next_cursor}
+        )
+        assert response.status_code == 200
+        page = response.context['comments']
+        loaded.extend(page)
+    assert [c.pk for c in loaded] == [
+        c.pk for c in sorted(comments, key=lambda c: (c.created_at, c.pk))
+    ]
+
+
+def test_post_comments_fragment_respects_visibility(
+        client, mixer, post_with_published_location):
+    post_with_published_location.is_published = False
+    post_with_published_location.save()
+    response = client.get(f'/posts/{post_with_published_location.id}/comments/')
+    assert response.status_code == 404
@@ -0,0 +1,86 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+pytestmark = [pytest.mark.django_db]
+
+# Отметка для ETag, пост, первая порция комментариев;
+# для залогиненных — ещё сессия и пользователь
+DETAIL_QUERIES_ANONYMOUS = 3
+DETAIL_QUERIES_AUTHORISED = 5
+
+
+@pytest.fixture
+def post_with_many_comments(mixer, post_with_published_location):
+    authors = mixer.cycle(15).blend(get_user_model())
+    mixer.cycle(15).blend(
+        'blog.Comment',
+        post=post_with_published_location,
+        author=mixer.sequence(*authors),
+    )
+    return post_with_published_location
+
+
+@pytest.mark.parametrize(
+    ('client_fixture', 'budget'),
+    [
+        ('unlogged_client', DETAIL_QUERIES_ANONYMOUS),
+        ('user_client', DETAIL_QUERIES_AUTHORISED),
+        ('another_user_client', DETAIL_QUERIES_AUTHORISED),
+    ],
+)
+def test_post_detail_query_budget(
+        request, django_assert_max_num_queries, post_with_many_comments,
+        client_fixture, budget):
+    client = request.getfixturevalue(client_fixture)
+    url = f'/posts/{post_with_many_comments.id}/'
+    with django_assert_max_num_queries(budget):
+        response = client.get(url)
+    assert response.status_code == 200
+    assert len(response.context['comments']) == 15, (
+        'Убедитесь, что страница публикации выводит все комментарии и'
+        ' укладывается в фиксированное число запросов к базе данных.'
+    )
+
+
+def test_post_detail_hides_unpublished_post_in_one_query(
+        another_user_client, django_assert_max_num_queries,
+        post_with_published_location):
+    post_with_published_location.is_published = False
+    post_with_published_location.save()
+    with django_assert_max_num_queries(DETAIL_QUERIES_AUTHORISED - 1):
+        response = another_user_client.get(
+            f'/posts/{post_with_published_location.id}/'
+        )
+    assert response.status_code == 404
+
+
+def test_detector_catches_lazy_loads(post_with_many_comments):
+    from blogicum.middleware import NPlusOneError, detect_repeated_queries
+
+    comments = post_with_many_comments.comments.all()
+    with pytest.raises(NPlusOneError, match='auth_user'):
+        with detect_repeated_queries(threshold=2):
+            [comment.author.username for comment in comments]
+
+    with detect_repeated_queries(threshold=2):
+        [
+            comment.author.username
+            for comment in comments.select_related('author')
+        ]
+
+
+def test_detector_logs_in_log_mode(
+        settings, caplog, unlogged_client, post_with_many_comments,
+        monkeypatch):
+    settings.NPLUSONE_DETECTOR = 'log'
+    # Имитируем забытый select_related в ленте комментариев
+    monkeypatch.setattr(
+        type(post_with_many_comments.comments), 'select_related',
+        lambda self, *fields: self.all(), raising=False
+    )
+    response = unlogged_client.get(f'/posts/{post_with_many_comments.id}/')
+    assert response.status_code == 200
+    assert 'N+1' in caplog.text, (
+        'Убедитесь, что в режиме log детектор N+1 пишет предупреждение,'
+        ' а не роняет запрос.'
+    )
@@ -0,0 +1,170 @@
+import sqlite3
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+from blog.caching import cache_anonymous_page
+from blog.models import Post
+from blog.paginators import CachedCountPaginator
+from blogicum import replicas
+from blogicum.middleware import ReplicaMiddleware
+
+
+@pytest.fixture
+def two_replicas(settings, monkeypatch):
+    settings.DATABASE_REPLICAS = ['replica_1', 'replica_2']
+    down = set()
+    monkeypatch.setattr(replicas, 'is_healthy', lambda alias: alias not in down)
+    return down
+
+
+def test_router_reads_blog_models_from_replicas(two_replicas):
+    router = replicas.ReplicaRouter()
+    assert router.db_for_read(Post) is None, (
+        'Убедитесь, что без ReplicaMiddleware чтение идёт из default.'
+    )
+    chosen = set()
+    for _ in range(4):
+        with replicas.reading_from_replicas() as alias:
+            assert router.db_for_read(Post) == alias, (
+                'Убедитесь, что все чтения запроса идут в одну реплику.'
+            )
+            assert router.db_for_read(get_user_model()) == 'default'
+            assert router.db_for_write(Post) == 'default'
+            chosen.add(alias)
+    assert chosen == {'replica_1', 'replica_2'}, (
+        'Убедитесь, что реплики выбираются по кругу.'
+    )
+
+    two_replicas.add('replica_1')
+    for _ in range(4):
+        with replicas.reading_from_replicas() as alias:
+            assert alias == 'replica_2', (
+                'Убедитесь, что неисправная реплика пропускается.'
+            )
+    two_replicas.add('replica_2')
+    with replicas.reading_from_replicas():
+        assert router.db_for_read(Post) is None
+
+
+def _observe(path, method='get', cookies=None, status=200):
+    seen = {}
+
+    def view(request):
+        seen['alias'] = replicas.ReplicaRouter().db_for_read(Post)
+        return HttpResponse(status=status)
+
+    request = getattr(RequestFactory(), method)(path)
+    request.COOKIES.update(cookies or {})
+    request.resolver_match = resolve(path)
+    middleware = ReplicaMiddleware(view)
+
+    def get_response(request):
+        middleware.process_view(request, view, (), {})
+        return view(request)
+
+    middleware.get_response = get_response
+    response = middleware(request)
+    return seen['alias'], response
+
+
+def test_middleware_pins_writers_to_primary(two_replicas, settings):
+    alias, response = _observe('/')
+    assert alias in ('replica_1', 'replica_2'), (
+        'Убедитесь, что GET-запрос к ленте читает из реплики.'
+    )
+    assert settings.REPLICA_PIN_COOKIE not in response.cookies
+    assert replicas.ReplicaRouter().db_for_read(Post) is None
+
+    assert _observe('/admin/')[0] is None, (
+        'Убедитесь, что реплики включаются только для представлений блога.'
+    )
+
+    alias, response = _observe('/posts/create/', method='post')
+    assert alias is None
+    cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+    assert cookie['max-age'] == settings.REPLICA_PIN_SECONDS, (
+        'Убедитесь, что после записи посетитель закрепляется за default.'
+    )
+
+    alias, _ = _observe(
+        '/', cookies={settings.REPLICA_PIN_COOKIE: cookie.value}
+    )
+    assert alias is None
+
+    _, response = _observe('/posts/create/', method='post', status=403)
+    assert settings.REPLICA_PIN_COOKIE not in response.cookies, (
+        'Убедитесь, что неудачный запрос на запись не закрепляет'
+        ' посетителя за default.'
+    )
+
+
+@pytest.mark.django_db
+def test_shared_caches_are_filled_from_primary(
+        two_replicas, post_with_published_location):
+    # Реплик нет в DATABASES: чтение из них упало бы
+    seen = []
+
+    @cache_anonymous_page('index')
+    def view(request):
+        seen.append(replicas.ReplicaRouter().db_for_read(Post))
+        return HttpResponse()
+
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    with replicas.reading_from_replicas():
+        view(request)
+        paginator = CachedCountPaginator(
+            Post.objects.all(), 10, count_key=('index',)
+        )
+        assert paginator.count == 1
+    assert seen == [None], (
+        'Убедитесь, что страница для общего кэша строится по данным'
+        ' из default, а не из отстающей реплики.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_replica_copies_default(post_with_published_location, tmp_path):
+    target = tmp_path / 'replica.sqlite3'
+    replicas.sync_replica(target)
+    with sqlite3.connect(target) as replica:
+        titles = [row[0] for row in replica.execute(
+            'SELECT title FROM blog_post'
+        )]
+    assert titles == [post_with_published_location.title]
+
+
+@pytest.fixture
+def unsynced_replica(settings, tmp_path, django_db_blocker):
+    alias = 'replica_unsynced'
+    connections.settings[alias] = {
+        **connections.settings['default'],
+        'NAME': str(tmp_path / 'never_synced.sqlite3'),
+        'TEST': {},
+    }
+    settings.DATABASE_REPLICAS = [alias]
+    replicas._health.clear()
+    with django_db_blocker.unblock():
+        yield alias
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+    replicas._health.clear()
+
+
+@pytest.mark.django_db
+def test_unsynced_replica_is_skipped(
+        unsynced_replica, client, post_with_published_location):
+    assert not replicas.is_healthy(unsynced_replica), (
+        'Убедитесь, что реплика без таблиц блога считается неисправной.'
+    )
+    response = client.get(f'/posts/{post_with_published_location.id}/')
+    assert response.status_code == 200, (
+        'Убедитесь, что при неисправной реплике чтение идёт из default.'
+    )
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Post
+from blog.search import rebuild_index, search_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(params=['fts5', 'terms'])
+def search_backend(request, settings):
+    settings.BLOG_SEARCH_BACKEND = request.param
+    return request.param
+
+
+@pytest.fixture
+def searchable_posts(mixer, user, published_category, search_backend):
+    def make(title, text, **kwargs):
+        fields = {
+            'is_published': True,
+            'pub_date': timezone.now() - timedelta(days=1),
+            **kwargs,
+        }
+        return mixer.blend(
+            'blog.Post', title=title, text=text, author=user,
+            category=published_category, location=None, **fields
+        )
+
+    return {
+        'in_title': make('Ёлки в Москве', 'Про зиму.'),
+        'in_text': make('Зима', 'Наряжаем ёлку во дворе, Москва.'),
+        'other': make('Лето', 'Купаемся в море.'),
+        'hidden': make('Ёлки снятые', 'Москва', is_published=False),
+        'future': make(
+            'Ёлки будущие', 'Москва',
+            pub_date=timezone.now() + timedelta(days=1)
+        ),
+    }
+
+
+def test_search_ranks_and_respects_publication(searchable_posts):
+    # Последнее слово ищется по префиксу, ё и е не различаются
+    found = list(search_posts('ёл'))
+    assert found == [
+        searchable_posts['in_title'], searchable_posts['in_text']
+    ], 'Убедитесь, что совпадение в заголовке ранжируется выше.'
+    assert list(search_posts('москве ел')) == [searchable_posts['in_title']]
+    assert searchable_posts['hidden'] not in found
+    assert searchable_posts['future'] not in found
+    assert list(search_posts('"; DROP TABLE -- *')) == []
+    assert list(search_posts('')) == []
+
+
+def test_index_follows_edits(searchable_posts):
+    post = searchable_posts['other']
+    assert list(search_posts('море')) == [post]
+    post.text = 'Катаемся на лыжах.'
+    post.save()
+    assert list(search_posts('море')) == []
+    assert list(search_posts('лыжах')) == [post]
+    post.delete()
+    assert list(search_posts('лыжах')) == []
+
+
+def test_rebuild_index(searchable_posts):
+    Post.objects.filter(pk=searchable_posts['other'].pk).update(
+        title='Осень'
+    )
+    rebuild_index()
+    assert list(search_posts('осень')) == [searchable_posts['other']]
+
+
+def test_search_page(client, searchable_posts):
+    response = client.get('/search/', {'q': 'Купаемся'})
+    assert response.status_code == 200
+    assert list(response.context['page_obj']) == [searchable_posts['other']]
+    assert 'Лето' in response.content.decode('utf-8')
+    assert client.get('/search/').status_code == 200
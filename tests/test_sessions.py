@@ -0,0 +1,66 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import Client
+
+from blogicum.auth import CachedModelBackend
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize('engine', ['cached_db', 'signed_cookies'])
+def test_logged_in_page_without_session_and_user_queries(
+        settings, user, django_assert_num_queries, engine
+):
+    settings.SESSION_ENGINE = settings.SESSION_ENGINES[engine]
+    client = Client()
+    client.force_login(user)
+    client.get('/pages/about/')
+    with django_assert_num_queries(0):
+        response = client.get('/pages/about/')
+    assert user.username in response.content.decode('utf-8'), (
+        'Убедитесь, что пользователь и сессия берутся из кэша, а не из'
+        ' базы.'
+    )
+
+
+def test_cached_user_is_forgotten_on_change(user_client, user):
+    backend = CachedModelBackend()
+    assert backend.get_user(user.pk).first_name == user.first_name
+
+    response = user_client.post('/profile/edit/', {
+        'username': user.username,
+        'first_name': 'Новое имя',
+        'last_name': user.last_name,
+        'email': 'new@example.com',
+    })
+    assert response.status_code == 302
+    assert backend.get_user(user.pk).first_name == 'Новое имя', (
+        'Убедитесь, что правка профиля сбрасывает пользователя в кэше.'
+    )
+
+    user.refresh_from_db()
+    user.set_password('another-password-123')
+    user.save()
+    assert user_client.get('/pages/about/').context['user'].is_anonymous, (
+        'Убедитесь, что после смены пароля старые сессии недействительны.'
+    )
+
+
+def test_inactive_user_is_not_authenticated(user):
+    backend = CachedModelBackend()
+    backend.get_user(user.pk)
+    get_user_model().objects.filter(pk=user.pk).update(is_active=False)
+    user.refresh_from_db()
+    user.save()
+    assert backend.get_user(user.pk) is None
+
+
+def test_production_profile_shares_session_cache():
+    from blogicum import settings_production
+
+    for alias in ('sessions', 'pages'):
+        backend = settings_production.CACHES[alias]['BACKEND']
+        assert not backend.endswith('LocMemCache'), (
+            'Убедитесь, что в профиле production кэш сессий и страниц'
+            ' общий для всех процессов сервера.'
+        )
@@ -0,0 +1,37 @@
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from blogicum import settings_production
+
+
+def _pragma(connection, name):
+    return connection.connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+
+def test_pragmas_applied_to_new_connections(
+        settings, tmp_path, django_db_blocker
+):
+    settings.SQLITE_PRAGMAS = settings_production.SQLITE_PRAGMAS
+    connection = DatabaseWrapper({
+        **connections.databases['default'], 'NAME': str(tmp_path / 'db'),
+    }, 'pragmas')
+    try:
+        with django_db_blocker.unblock():
+            connection.ensure_connection()
+        assert _pragma(connection, 'journal_mode') == 'wal', (
+            'Убедитесь, что профиль production включает журнал WAL.'
+        )
+        assert _pragma(connection, 'synchronous') == 1
+        assert _pragma(connection, 'busy_timeout') == 5000
+        assert _pragma(connection, 'cache_size') == -20000
+    finally:
+        connection.close()
+
+
+def test_production_profile_keeps_development_settings(settings):
+    assert settings_production.DEBUG is False
+    assert settings_production.DATABASES['default']['CONN_MAX_AGE'] == 600
+    assert not settings.DATABASES['default'].get('CONN_MAX_AGE'), (
+        'Убедитесь, что импорт профиля production не меняет настройки'
+        ' разработки.'
+    )
@@ -0,0 +1,83 @@
+import re
+
+import pytest
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from blogicum.middleware import StaticFilesMiddleware
+
+STORAGE = 'blogicum.storage.CompressedManifestStaticFilesStorage'
+# Версия Bootstrap, которую подключает base.html
+BOOTSTRAP_VERSION = '5.0.1'
+
+
+@pytest.fixture
+def built_static(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    call_command('build_static')
+    settings.STATICFILES_STORAGE = STORAGE
+    return tmp_path
+
+
+def _serve(path, **headers):
+    middleware = StaticFilesMiddleware(lambda request: HttpResponse('view'))
+    return middleware(RequestFactory().get(path, **headers))
+
+
+def test_build_static_hashes_and_compresses(built_static):
+    hashed = list(built_static.glob('css/bootstrap.min.*.css'))
+    assert len(hashed) == 1, (
+        'Убедитесь, что build_static сохраняет файлы с хэшем в имени.'
+    )
+    assert hashed[0].with_name(f'{hashed[0].name}.gz').exists()
+    assert (built_static / 'staticfiles.json').exists()
+    assert not (built_static / 'css/img/logo.png.gz').exists(), (
+        'Убедитесь, что уже сжатые форматы не сжимаются повторно.'
+    )
+
+
+@pytest.mark.django_db
+def test_pages_link_hashed_local_assets(built_static, client):
+    content = client.get('/pages/about/').content.decode('utf-8')
+    linked = re.search(
+        r'href="/static/(css/bootstrap\.min\.[0-9a-f]{12}\.css)"', content
+    )
+    assert linked, (
+        'Убедитесь, что страницы подключают локальный bootstrap с хэшем.'
+    )
+    header = (built_static / linked.group(1)).read_text('utf-8')[:200]
+    assert f'Bootstrap v{BOOTSTRAP_VERSION} ' in header, (
+        f'Убедитесь, что страницы подключают Bootstrap {BOOTSTRAP_VERSION}.'
+    )
+    assert 'cdn.jsdelivr.net' not in content
+    assert re.search(r'/static/css/img/fav/favicon\.[0-9a-f]{12}\.ico', content)
+
+
+def test_middleware_serves_compressed_immutable_files(built_static):
+    name = next(built_static.glob('css/bootstrap.min.*.css')).name
+    response = _serve(
+        f'/static/css/{name}', HTTP_ACCEPT_ENCODING='gzip, deflate'
+    )
+    assert response.status_code == 200
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert response['Vary'] == 'Accept-Encoding'
+    body = b''.join(response.streaming_content)
+    assert body == (built_static / 'css' / f'{name}.gz').read_bytes()
+
+    plain = _serve(f'/static/css/{name}', HTTP_ACCEPT_ENCODING='gzip;q=0')
+    assert not plain.has_header('Content-Encoding')
+    assert plain['ETag'] != response['ETag']
+
+    cached = _serve(
+        f'/static/css/{name}', HTTP_ACCEPT_ENCODING='gzip',
+        HTTP_IF_NONE_MATCH=response['ETag'],
+    )
+    assert cached.status_code == 304
+
+    unhashed = _serve('/static/css/bootstrap.min.css')
+    assert unhashed['Cache-Control'] == 'public, max-age=60', (
+        'Убедитесь, что файлы без хэша в имени не кэшируются надолго.'
+    )
+    assert _serve('/static/missing.css').content == b'view'
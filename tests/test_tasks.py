@@ -0,0 +1,116 @@
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError
+from django.utils import timezone
+
+from tasks import queue
+from tasks.models import Job
+from tasks.queue import claim, enqueue, release_stale, run_job, run_pending
+
+pytestmark = [pytest.mark.django_db]
+
+CALLS = []
+
+
+def remember(*args, **kwargs):
+    CALLS.append((args, kwargs))
+
+
+def explode():
+    raise RuntimeError('сбой задачи')
+
+
+@pytest.fixture(autouse=True)
+def forget_calls():
+    CALLS.clear()
+
+
+def test_enqueued_job_runs_once():
+    job = enqueue(f'{__name__}.remember', 1, 'два', three=3)
+    assert run_pending() == 1
+    assert CALLS == [((1, 'два'), {'three': 3})]
+    job.refresh_from_db()
+    assert job.status == Job.DONE and job.attempts == 1
+    assert run_pending() == 0
+
+
+def test_claimed_job_is_not_claimed_twice():
+    job = enqueue(f'{__name__}.remember')
+    assert claim(10, 'первый') == [job.pk]
+    assert claim(10, 'второй') == [], (
+        'Убедитесь, что задачу не может забрать второй обработчик.'
+    )
+    assert Job.objects.get(pk=job.pk).locked_by == 'первый'
+
+
+def test_future_job_waits():
+    enqueue(f'{__name__}.remember',
+            run_at=timezone.now() + timedelta(minutes=5))
+    assert run_pending() == 0
+
+
+def test_failed_job_is_retried_with_backoff(settings):
+    settings.TASKS_RETRY_BASE_DELAY = 60
+    job = enqueue(f'{__name__}.explode', max_attempts=2)
+    claim(1)
+    assert run_job(job.pk) == Job.QUEUED
+    job.refresh_from_db()
+    assert 'сбой задачи' in job.last_error
+    assert job.run_at > timezone.now() + timedelta(seconds=25), (
+        'Убедитесь, что повтор задачи откладывается.'
+    )
+    assert run_pending() == 0
+
+    Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+    claim(1)
+    assert run_job(job.pk) == Job.FAILED
+
+
+def test_stale_jobs_are_released(settings):
+    job = enqueue(f'{__name__}.remember')
+    claim(1)
+    Job.objects.filter(pk=job.pk).update(
+        locked_at=timezone.now() - timedelta(
+            seconds=settings.TASKS_LOCK_TIMEOUT + 1
+        )
+    )
+    assert release_stale() == 1
+    assert run_pending() == 1
+
+
+def test_run_worker_once():
+    for number in range(3):
+        enqueue(f'{__name__}.remember', number)
+    output = io.StringIO()
+    call_command('run_worker', once=True, concurrency=1, stdout=output)
+    assert sorted(args for args, _ in CALLS) == [(0,), (1,), (2,)]
+    assert 'Выполнено задач: 3' in output.getvalue()
+
+
+def test_run_worker_survives_database_errors(monkeypatch):
+    broken, healthy = (
+        enqueue(f'{__name__}.remember', number) for number in range(2)
+    )
+    run_job = queue.run_job
+
+    def flaky_run_job(pk):
+        if pk == broken.pk:
+            raise OperationalError('database is locked')
+        return run_job(pk)
+
+    monkeypatch.setattr(queue, 'run_job', flaky_run_job)
+    output = io.StringIO()
+    call_command('run_worker', once=True, concurrency=1, stdout=output)
+    assert CALLS == [((1,), {})], (
+        'Убедитесь, что ошибка базы в одной задаче не останавливает'
+        ' обработчик.'
+    )
+    broken.refresh_from_db()
+    assert broken.status == Job.QUEUED and broken.attempts == 1, (
+        'Убедитесь, что задача с ошибкой базы возвращается в очередь'
+        ' как неудачная попытка.'
+    )
+    assert 'database is locked' in broken.last_error